@@ -0,0 +1,169 @@
+"""
+Modo em lote do degrees.py.
+
+Lê vários pares de nomes "origem<TAB>destino" e escreve um objeto JSON
+por linha com a resposta de cada par. O grafo é carregado uma única vez
+e, com mais de um worker, compartilhado somente para leitura com um pool
+de processos.
+
+Uso: python degrees.py batch [directory] [--input FILE] [--workers N]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import degrees
+
+# Opções da execução atual, herdadas também pelos workers via fork
+options = {"bidirectional": False, "max_degrees": None, "timeout": None}
+
+
+def read_pairs(lines):
+    """
+    Gera os pares (origem, destino), ignorando linhas vazias e comentários.
+    """
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        fields = line.split("\t")
+        if len(fields) != 2:
+            yield line, None
+        else:
+            yield fields[0].strip(), fields[1].strip()
+
+
+def resolve(name):
+    """
+    Retorna (person_id, erro) para um nome, sem perguntar ao usuário.
+    """
+    if degrees.graph is not None:
+        person_ids = degrees.graph.person_ids_for_name(name)
+    else:
+        person_ids = sorted(degrees.names.get(name.lower(), set()))
+    if len(person_ids) == 1:
+        return person_ids[0], None
+    elif not person_ids:
+        candidates = ", ".join(
+            degrees.person_for_id(person_id)["name"] + f" ({person_id})"
+            for person_id in degrees.suggestions(name, 5)
+        )
+        if candidates:
+            return None, f"person not found: {name}; did you mean: {candidates}"
+        return None, f"person not found: {name}"
+    return None, f"ambiguous name: {name} ({', '.join(person_ids)})"
+
+
+def answer(pair):
+    """
+    Responde um par e retorna o resultado pronto para virar JSON.
+    """
+    source_name, target_name = pair
+    result = {"source": source_name, "target": target_name}
+    if target_name is None:
+        result["error"] = "expected two tab-separated names"
+        return result
+
+    start = time.perf_counter()
+    source, error = resolve(source_name)
+    if error is None:
+        target, error = resolve(target_name)
+    if error is not None:
+        result["error"] = error
+        return result
+
+    stats = {}
+    path = degrees.shortest_path(source, target, options["bidirectional"], stats,
+                                 options["max_degrees"],
+                                 degrees.deadline_after(options["timeout"]))
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    result["explored"] = stats.get("explored", 0)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    elif isinstance(path, degrees.Unknown):
+        result["degrees"] = None
+        result["path"] = None
+        result["unknown"] = {"reason": path.reason, "more_than": path.more_than}
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [
+            {
+                "movie_id": movie_id,
+                "movie": degrees.movie_for_id(movie_id)["title"],
+                "person_id": person_id,
+                "person": degrees.person_for_id(person_id)["name"],
+            }
+            for movie_id, person_id in path
+        ]
+    return result
+
+
+def initialize(args):
+    """
+    Carrega os dados e guarda as opções da execução.
+    """
+    options["bidirectional"] = args.bidirectional
+    options["max_degrees"] = args.max_degrees
+    options["timeout"] = args.timeout
+    degrees.load_data(args.directory, engine=args.engine,
+                      use_snapshot=not args.no_snapshot,
+                      use_landmarks=args.landmarks, use_costars=args.costars)
+    if args.tree_cache:
+        degrees.enable_tree_cache(args.tree_cache)
+
+
+def run(pairs, output, workers=1, chunksize=16):
+    """
+    Responde todos os pares e escreve os resultados em `output` como
+    linhas JSON, na ordem da entrada, assim que cada um fica pronto.
+    """
+    if workers <= 1:
+        results = map(answer, pairs)
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+        return
+
+    # Com fork os workers herdam o grafo carregado em copy-on-write: os
+    # arrays csr nunca são escritos e as páginas do snapshot são
+    # compartilhadas pelo page cache, então nada é copiado por worker.
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers) as pool:
+        for result in pool.imap(answer, pairs, chunksize):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="degrees.py batch",
+        description="Answer many degrees-of-separation queries as JSON lines.",
+    )
+    degrees.add_data_arguments(parser)
+    parser.add_argument("--input", default="-",
+                        help="file with tab-separated name pairs (default: stdin)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes")
+    args = parser.parse_args(argv)
+
+    if args.workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        sys.exit("Parallel batch mode needs the fork start method; use --workers 1.")
+
+    print("Loading data...", file=sys.stderr)
+    initialize(args)
+    print("Data loaded.", file=sys.stderr)
+
+    if args.input == "-":
+        run(read_pairs(sys.stdin), sys.stdout, args.workers)
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            run(read_pairs(f), sys.stdout, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Benchmarks para o degrees.py.
+
+Gera conjuntos de dados sintéticos no formato do IMDB, com popularidade
+seguindo uma lei de potência, e compara os motores de busca em tempo de
+carga, pico de memória (RSS), latência p50/p99 e pessoas exploradas, sobre
+um conjunto fixo de consultas sorteadas com semente.
+
+O comando names mede as sugestões de nomes (nameindex.NameIndex.search)
+com nomes exatos, com um erro de digitação e com prefixos.
+
+Uso:
+    python benchmark.py generate DIRECTORY [--stars N] [--seed S]
+    python benchmark.py run DIRECTORY [--queries N] [--seed S] [--engines ...]
+    python benchmark.py names DIRECTORY [--queries N] [--seed S]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+import zlib
+
+# Cada motor é um par (argumentos de load_data, argumentos de shortest_path).
+# Para comparar uma busca nova basta acrescentar uma entrada aqui.
+ENGINES = {
+    "dict": ({"engine": "dict"}, {}),
+    "dict-bidirectional": ({"engine": "dict"}, {"bidirectional": True}),
+    "csr-csv": ({"engine": "csr", "use_snapshot": False}, {}),
+    "csr": ({"engine": "csr"}, {}),
+    "csr-bidirectional": ({"engine": "csr"}, {"bidirectional": True}),
+    "csr-costars": ({"engine": "csr", "use_costars": True}, {}),
+    "csr-landmarks": ({"engine": "csr", "use_landmarks": True}, {}),
+}
+
+FIRST_NAMES = ("Ana", "Bruno", "Carla", "Daniel", "Elisa", "Felipe", "Gabriela",
+               "Hugo", "Isabel", "João", "Karen", "Lucas", "Marina", "Nuno",
+               "Olga", "Paulo", "Rita", "Samuel", "Tânia", "Vitor")
+LAST_NAMES = ("Almeida", "Barbosa", "Cardoso", "Dias", "Esteves", "Ferreira",
+              "Gomes", "Henriques", "Lima", "Martins", "Nogueira", "Oliveira",
+              "Pereira", "Queiroz", "Ribeiro", "Santos", "Teixeira", "Vieira")
+
+
+def generate(directory, stars, seed=0):
+    """
+    Escreve people.csv, movies.csv e stars.csv com cerca de `stars` linhas
+    em stars.csv.
+
+    A quantidade de filmes por pessoa segue uma lei de potência (poucas
+    pessoas muito populares, muitas com um ou dois filmes) e o elenco de
+    cada filme tem tamanho geométrico, como no conjunto "large" do IMDB.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    num_people = max(2, stars // 4)
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(num_people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {person}"
+            writer.writerow([str(person + 1), name, str(rng.randint(1920, 2005))])
+
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        written = 0
+        movie = 0
+        while written < stars:
+            cast = set()
+            while True:
+                # Metade das vagas vai para índices de cauda pesada (as
+                # primeiras pessoas são as estrelas), o resto é uniforme
+                if rng.random() < 0.5:
+                    person = rng.randrange(num_people)
+                else:
+                    person = int((rng.paretovariate(1.1) - 1) * num_people / 100) % num_people
+                cast.add(person)
+                if rng.random() < 0.25 or len(cast) >= 30:
+                    break
+            for person in cast:
+                writer.writerow([person + 1, movie + 1])
+            written += len(cast)
+            movie += 1
+    num_movies = movie
+
+    # Um filme por elenco sorteado, para não repetir pares (pessoa, filme)
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(num_movies):
+            writer.writerow([str(movie + 1), f"Movie {movie + 1}",
+                             str(rng.randint(1930, 2024))])
+
+
+def query_pairs(directory, count, seed=0):
+    """Conjunto fixo de pares de ids, sorteados a partir de `seed`."""
+    with open(os.path.join(directory, "people.csv"), encoding="utf-8") as f:
+        person_ids = [row["id"] for row in csv.DictReader(f)]
+    rng = random.Random(seed)
+    return [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(count)]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def peak_rss_mb():
+    """
+    Pico de memória residente deste processo, em MB.
+
+    VmHWM recomeça no exec; ru_maxrss herdaria o pico do processo que o
+    criou, então só é usado onde não há /proc.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # ru_maxrss vem em KiB no Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def measure(directory, engine, count, seed):
+    """
+    Mede um motor neste processo e retorna o resultado como dicionário.
+    Roda em um subprocesso por motor para que RSS e carga sejam isolados.
+    """
+    import degrees
+
+    load_options, search_options = ENGINES[engine]
+    start = time.perf_counter()
+    degrees.load_data(directory, **load_options)
+    load_time = time.perf_counter() - start
+
+    latencies = []
+    explored = []
+    lengths = []
+    for source, target in query_pairs(directory, count, seed):
+        stats = {}
+        start = time.perf_counter()
+        path = degrees.shortest_path(source, target, stats=stats, **search_options)
+        latencies.append(time.perf_counter() - start)
+        explored.append(stats.get("explored", 0))
+        lengths.append(-1 if path is None else len(path))
+
+    return {
+        "engine": engine,
+        "load_s": round(load_time, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_explored": round(sum(explored) / len(explored), 1),
+        "p99_explored": percentile(explored, 0.99),
+        # Todos os motores devem achar os mesmos comprimentos de caminho
+        "lengths_crc": zlib.crc32(json.dumps(lengths).encode()),
+    }
+
+
+def prepare(directory, engines):
+    """Cria snapshot e índices de nomes e de landmarks antes das medições."""
+    if any(ENGINES[engine][0].get("engine") == "dict" for engine in engines):
+        import degrees
+
+        degrees.load_data(directory)
+    if any(ENGINES[engine][0].get("engine") == "csr" for engine in engines):
+        import degrees
+        from landmarks import LandmarkIndex
+
+        degrees.load_data(directory, engine="csr",
+                          use_costars="csr-costars" in engines)
+        if "csr-landmarks" in engines and LandmarkIndex.load(directory) is None:
+            LandmarkIndex.build(degrees.graph).save(directory)
+
+
+def run(directory, engines, count, seed):
+    # Também em um subprocesso, para que este processo continue pequeno
+    subprocess.run([sys.executable, os.path.abspath(__file__), "prepare",
+                    directory, "--engines", *engines],
+                   check=True, capture_output=True)
+    results = []
+    for engine in engines:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "measure", directory,
+             "--engine", engine, "--queries", str(count), "--seed", str(seed)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.splitlines()[-1]))
+
+    columns = ("engine", "load_s", "peak_rss_mb", "p50_ms", "p99_ms",
+               "mean_explored", "p99_explored", "lengths_crc")
+    widths = [max(len(column), *(len(str(result[column])) for result in results))
+              for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).ljust(width)
+                        for column, width in zip(columns, widths)))
+    if len({result["lengths_crc"] for result in results}) > 1:
+        print("Warning: engines disagree on path lengths.")
+    return results
+
+
+def name_queries(names, count, seed=0):
+    """
+    Consultas de nomes sorteadas a partir de `seed`: para cada tipo, pares
+    (texto digitado, nome pretendido).
+    """
+    rng = random.Random(seed)
+    exact, typo, prefix = [], [], []
+    for _ in range(count):
+        name = rng.choice(names)
+        exact.append((name, name))
+        i = rng.randrange(len(name))
+        typo.append((name[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + name[i + 1:], name))
+        prefix.append((name[:rng.randrange(3, len(name))], name))
+    return {"exact": exact, "typo": typo, "prefix": prefix}
+
+
+def names(directory, count, seed):
+    """Latência e acertos das sugestões de nomes sobre o grafo csr."""
+    from graph import Graph
+
+    graph = Graph.load(directory)
+    index = graph.name_index()
+    people = [graph.person_names[i] for i in range(len(graph.person_names))]
+
+    results = []
+    for kind, queries in name_queries(people, count, seed).items():
+        latencies = []
+        found = 0
+        for typed, name in queries:
+            start = time.perf_counter()
+            suggestions = index.search(typed)
+            latencies.append(time.perf_counter() - start)
+            # O prefixo pode ter muito mais de 10 donos: basta um que comece com ele
+            if kind == "prefix":
+                found += any(other.startswith(typed.lower()) for other in suggestions)
+            else:
+                found += name.lower() in suggestions
+        results.append({
+            "queries": kind,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "max_ms": round(max(latencies) * 1000, 3),
+            "found": f"{found / len(queries):.1%}",
+        })
+
+    print(f"{len(people)} names")
+    columns = ("queries", "p50_ms", "p99_ms", "max_ms", "found")
+    widths = [max(len(column), *(len(str(result[column])) for result in results))
+              for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).ljust(width)
+                        for column, width in zip(columns, widths)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for degrees.py.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("generate", help="write a synthetic dataset")
+    command.add_argument("directory")
+    command.add_argument("--stars", type=int, default=100_000,
+                         help="rows in stars.csv (10k to 10M)")
+    command.add_argument("--seed", type=int, default=0)
+
+    for name in ("run", "measure"):
+        command = commands.add_parser(name, help="compare engines" if name == "run"
+                                      else "measure one engine (used by run)")
+        command.add_argument("directory")
+        command.add_argument("--queries", type=int, default=200)
+        command.add_argument("--seed", type=int, default=0)
+        if name == "run":
+            command.add_argument("--engines", nargs="+", choices=ENGINES,
+                                 default=["dict", "csr", "csr-bidirectional"])
+        else:
+            command.add_argument("--engine", choices=ENGINES, required=True)
+
+    command = commands.add_parser("prepare", help="build the snapshot and "
+                                  "landmarks for the engines (used by run)")
+    command.add_argument("directory")
+    command.add_argument("--engines", nargs="+", choices=ENGINES, required=True)
+
+    command = commands.add_parser("names", help="measure name suggestions")
+    command.add_argument("directory")
+    command.add_argument("--queries", type=int, default=1000)
+    command.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate(args.directory, args.stars, args.seed)
+    elif args.command == "names":
+        names(args.directory, args.queries, args.seed)
+    elif args.command == "prepare":
+        prepare(args.directory, args.engines)
+    elif args.command == "run":
+        run(args.directory, args.engines, args.queries, args.seed)
+    else:
+        print(json.dumps(measure(args.directory, args.engine, args.queries, args.seed)))
+
+
+if __name__ == "__main__":
+    main()
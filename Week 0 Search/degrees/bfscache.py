@@ -0,0 +1,128 @@
+from collections import OrderedDict, deque
+
+from util import Unknown, expired
+
+# Estimativa de bytes por estado guardado em uma árvore (entrada do dict de
+# pais, tupla (pai, ação, profundidade) e, às vezes, um lugar na fila)
+BYTES_PER_STATE = 160
+
+
+class BFSTree():
+    """
+    Busca em largura a partir de `source` que pode parar e continuar.
+
+    `parents` guarda, para cada estado descoberto, (estado anterior, ação,
+    profundidade) e `queue` os estados descobertos que ainda não foram
+    expandidos.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.parents = {source: (None, None, 0)}
+        self.queue = deque([source])
+
+    def complete(self):
+        return not self.queue
+
+    def expand_until(self, target, neighbors, max_degrees=None, deadline=None):
+        """
+        Continua a busca até descobrir `target` ou esgotar o componente.
+
+        Retorna (explorados, limite): o número de estados expandidos nesta
+        chamada e um Unknown se a busca parou em `max_degrees` ou no
+        `deadline`, ou None caso contrário. O que já foi descoberto continua
+        na árvore para a próxima consulta.
+        """
+        parents = self.parents
+        queue = self.queue
+        explored = 0
+        while queue and target not in parents:
+            depth = parents[queue[0]][2]
+            if max_degrees is not None and depth >= max_degrees:
+                return explored, Unknown("max_degrees", max_degrees)
+            if expired(deadline):
+                return explored, Unknown("deadline", depth)
+            state = queue.popleft()
+            explored += 1
+            for action, neighbor in neighbors(state):
+                if neighbor not in parents:
+                    parents[neighbor] = (state, action, depth + 1)
+                    queue.append(neighbor)
+        return explored, None
+
+    def path(self, target):
+        """Caminho (ação, estado) até `target` seguindo os ponteiros."""
+        if target not in self.parents:
+            return None
+        path = []
+        state = target
+        while state != self.source:
+            previous, action, _ = self.parents[state]
+            path.append((action, state))
+            state = previous
+        path.reverse()
+        return path
+
+    def size(self):
+        return BYTES_PER_STATE * len(self.parents)
+
+
+class BFSTreeCache():
+    """
+    Cache LRU de árvores de busca em largura, uma por origem.
+
+    Uma consulta de uma origem já vista vira uma caminhada de ponteiros;
+    se o destino ainda não foi alcançado, a busca continua de onde parou.
+    Árvores menos usadas são descartadas quando o tamanho estimado passa
+    de `max_bytes`; uma árvore que sozinha passa do orçamento responde à
+    consulta que a criou e não fica guardada.
+    """
+
+    def __init__(self, neighbors, max_bytes=256 * 1024 * 1024):
+        self.neighbors = neighbors
+        self.max_bytes = max_bytes
+        self.trees = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def shortest_path(self, source, target, stats=None, max_degrees=None,
+                      deadline=None):
+        """
+        Retorna o caminho (ação, estado) de `source` até `target`, None se
+        não houver, ou Unknown se a busca parar em `max_degrees` ou no
+        `deadline`.
+        """
+        tree = self.trees.get(source)
+        if tree is None:
+            self.misses += 1
+            tree = BFSTree(source)
+            self.trees[source] = tree
+        else:
+            self.hits += 1
+            self.trees.move_to_end(source)
+
+        explored, limit = tree.expand_until(target, self.neighbors,
+                                            max_degrees, deadline)
+        if stats is not None:
+            stats["explored"] = explored
+        self.evict()
+        if limit is not None:
+            return limit
+
+        path = tree.path(target)
+        if path is not None and max_degrees is not None and len(path) > max_degrees:
+            return Unknown("max_degrees", max_degrees)
+        return path
+
+    def memory(self):
+        return sum(tree.size() for tree in self.trees.values())
+
+    def evict(self):
+        """
+        Descarta as árvores mais antigas até caber no orçamento, inclusive
+        a mais recente se ela sozinha não cabe.
+        """
+        total = self.memory()
+        while total > self.max_bytes and self.trees:
+            _, tree = self.trees.popitem(last=False)
+            total -= tree.size()
@@ -1,7 +1,15 @@
+import argparse
 import csv
+import importlib
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+from bfscache import BFSTreeCache
+from graph import Graph
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+from util import (Node, DequeQueueFrontier, DisjointSet, Unknown,
+                  bidirectional_search, expired)
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +20,50 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Prefix and typo-tolerant index over the keys of `names` (dict engine),
+# built by load_data or read from its file next to the CSVs
+name_index = None
 
-def load_data(directory):
+# Sizes of the connected components, indexed by the "component" of each person
+component_sizes = []
+
+# Cache of BFS trees by source person, see enable_tree_cache (dict engine)
+tree_cache = None
+
+# Subcommands of degrees.py, each implemented by the module of the same name
+SUBCOMMANDS = {
+    "batch": "answer many pairs as JSON lines",
+    "landmarks": "build the landmark distance index",
+}
+
+# Compact integer-indexed graph, used instead of the dicts above by the csr engine
+graph = None
+
+
+def load_data(directory, engine="dict", use_snapshot=True, use_landmarks=False,
+              use_costars=False):
     """
     Load data from CSV files into memory.
+
+    With engine="csr" the data is loaded into a compact `Graph`
+    and the `names`, `people` and `movies` dicts stay empty. The graph is
+    read from a binary snapshot next to the CSVs when one is up to date,
+    and a new snapshot is written otherwise. The dict engine keeps its name
+    index in a snapshot of its own in the same way. With use_landmarks=True
+    the landmark index saved by `python degrees.py landmarks` is loaded too,
+    and with use_costars=True the person to co-star adjacency is precomputed
+    (in parallel) and kept in the snapshot.
     """
+    global graph
+    if engine == "csr":
+        graph = Graph.load(directory, use_snapshot, use_costars)
+        if use_landmarks:
+            graph.landmarks = LandmarkIndex.load(directory)
+            if graph.landmarks is None:
+                print("No up-to-date landmark index; "
+                      "run 'python degrees.py landmarks' first.", file=sys.stderr)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,15 +98,111 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    # Label connected components
+    label_components()
+
+    # Index the names for suggestions(), reusing the saved index if the
+    # CSVs have not changed
+    global name_index
+    sorted_names = sorted(names)
+    name_index = NameIndex.load(directory, sorted_names) if use_snapshot else None
+    if name_index is None:
+        name_index = NameIndex.build(sorted_names)
+        if use_snapshot:
+            try:
+                name_index.save(directory)
+            except OSError:
+                pass
+
+
+def label_components():
+    """
+    Stores in each person the id of their connected component,
+    using union-find over the stars of each movie.
+    """
+    person_ids = list(people)
+    index = {person_id: i for i, person_id in enumerate(person_ids)}
+    components = DisjointSet(len(person_ids))
+    for movie in movies.values():
+        stars = [index[person_id] for person_id in movie["stars"]]
+        for star in stars[1:]:
+            components.union(stars[0], star)
+
+    labels, sizes = components.labels()
+    for person_id, label in zip(person_ids, labels):
+        people[person_id]["component"] = label
+    component_sizes[:] = sizes
+
+
+def deadline_after(seconds):
+    """
+    Returns the time.monotonic deadline `seconds` from now, or None.
+    """
+    if seconds is None:
+        return None
+    return time.monotonic() + seconds
+
+
+def enable_tree_cache(megabytes):
+    """
+    Keeps the BFS tree of recent source people, up to about `megabytes`,
+    so later queries from the same source reuse and extend them.
+    """
+    global tree_cache
+    if graph is not None:
+        graph.tree_cache = BFSTreeCache(graph.neighbors, megabytes * 1024 * 1024)
+    else:
+        tree_cache = BFSTreeCache(neighbors_for_person, megabytes * 1024 * 1024)
+
+
+def add_data_arguments(parser):
+    """
+    Adds the arguments shared by every command that loads the dataset.
+    """
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--engine", choices=["dict", "csr"], default="dict",
+                        help="in-memory representation of the graph")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people at the same time")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="always parse the CSV files and rebuild the name index")
+    parser.add_argument("--landmarks", action="store_true",
+                        help="prune the search with the saved landmark index (csr engine)")
+    parser.add_argument("--costars", action="store_true",
+                        help="precompute person to co-star adjacency (csr engine)")
+    parser.add_argument("--max-degrees", type=int, metavar="N",
+                        help="give up on paths longer than N degrees")
+    parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                        help="give up on a search after SECONDS seconds")
+    parser.add_argument("--tree-cache", type=int, default=0, metavar="MB",
+                        help="cache BFS trees by source person, up to MB megabytes")
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    # Subcommands live in their own modules
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        module = importlib.import_module(sys.argv[1])
+        return module.main(sys.argv[2:])
+
+    parser = argparse.ArgumentParser(
+        description="Degrees of separation.",
+        epilog="Subcommands: " + ", ".join(
+            f"'{command}' ({description})"
+            for command, description in SUBCOMMANDS.items()
+        ) + ". Use 'python degrees.py <subcommand> --help' for details.",
+    )
+    add_data_arguments(parser)
+    parser.add_argument("--within", type=int, metavar="N",
+                        help="only answer whether the people are within N degrees")
+    args = parser.parse_args()
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(args.directory, engine=args.engine,
+              use_snapshot=not args.no_snapshot,
+              use_landmarks=args.landmarks, use_costars=args.costars)
+    if args.tree_cache:
+        enable_tree_cache(args.tree_cache)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,41 +212,88 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.within is not None:
+        if within(source, target, args.within):
+            print(f"Within {args.within} degrees of separation.")
+        else:
+            print(f"Not within {args.within} degrees of separation.")
+        return
+
+    stats = {}
+    path = shortest_path(source, target, args.bidirectional, stats,
+                         args.max_degrees, deadline_after(args.timeout))
 
     if path is None:
         print("Not connected.")
+    elif isinstance(path, Unknown):
+        print(f"Unknown: more than {path.more_than} degrees of separation "
+              f"({'search limit' if path.reason == 'max_degrees' else 'timed out'}).")
     else:
-        degrees = len(path) - 1
-        if degrees < 0:
-            degrees = 0
+        degrees = len(path)
         print(f"{degrees} degrees of separation.")
+        path = [(None, source)] + path
 
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_for_id(path[i][1])["name"]
+            person2 = person_for_id(path[i + 1][1])["name"]
+            movie = movie_for_id(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
+    print(f"{stats['explored']} people explored.")
 
-def shortest_path(source, target):
+
+def shortest_path(source, target, bidirectional=False, stats=None,
+                  max_degrees=None, deadline=None):
     """
     Retorna a lista mais curta de pares (movie_id, person_id)
     que conectam a origem ao destino.
 
     Se não houver caminho possível, retorna None.
+
+    Com `bidirectional=True` a busca parte da origem e do destino ao mesmo
+    tempo. Se `stats` for um dicionário, stats["explored"] recebe o número
+    de estados explorados.
+
+    `max_degrees` limita a profundidade da busca e `deadline` (um instante
+    de time.monotonic) o tempo; ao atingir um dos limites sem achar o
+    destino, retorna Unknown dizendo que a separação é maior que
+    `more_than` graus.
     """
+    # Com o motor csr a busca roda direto sobre os arrays do grafo
+    if graph is not None:
+        return graph.shortest_path(source, target, bidirectional, stats,
+                                   max_degrees, deadline)
+
+    # Pessoas em componentes diferentes nunca se conectam: responde em O(1)
+    if not connected(source, target):
+        if stats is not None:
+            stats["explored"] = 0
+        return None
+
+    if bidirectional:
+        return bidirectional_search(source, target, neighbors_for_person, stats,
+                                    max_degrees, deadline)
+
+    if tree_cache is not None:
+        return tree_cache.shortest_path(source, target, stats,
+                                        max_degrees, deadline)
+
     # Acompanhar o número de estados explorados
     num_explored = 0
+    if stats is not None:
+        stats["explored"] = num_explored
 
     # Verifica se o nó inicial é igual ao nó final
     if source == target:
         return []
 
     start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = DequeQueueFrontier()
     frontier.add(start)
 
+    # Profundidade de cada pessoa descoberta, para os limites
+    depths = {source: 0}
+
     # Inciar um conjunto explorado vazio
     explored = set()
 
@@ -115,7 +305,17 @@ def shortest_path(source, target):
 
         # Escolha um nó da fronteira
         node = frontier.remove()
+
+        # Tudo até esta profundidade já foi descoberto sem achar o destino
+        depth = depths[node.state]
+        if max_degrees is not None and depth >= max_degrees:
+            return Unknown("max_degrees", max_degrees)
+        if expired(deadline):
+            return Unknown("deadline", depth)
+
         num_explored += 1
+        if stats is not None:
+            stats["explored"] = num_explored
 
         # Marcar nó como explorado
         explored.add(node.state)
@@ -142,6 +342,7 @@ def shortest_path(source, target):
                     return solution
 
                 frontier.add(child)
+                depths[person_id] = depth + 1
 
 
 def person_id_for_name(name):
@@ -149,26 +350,106 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if graph is not None:
+        person_ids = graph.person_ids_for_name(name)
+    else:
+        person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
-        return None
+        person_ids = suggestions(name)
+        if len(person_ids) == 0:
+            return None
+        print(f"No exact match for '{name}'. Did you mean:")
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
-        return None
     else:
         return person_ids[0]
 
+    for person_id in person_ids:
+        person = person_for_id(person_id)
+        name = person["name"]
+        birth = person["birth"]
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    try:
+        person_id = input("Intended Person ID: ")
+        if person_id in person_ids:
+            return person_id
+    except ValueError:
+        pass
+    return None
+
+
+def suggestions(name, limit=10):
+    """
+    Returns the ids of people whose names are close to `name`
+    (typos or just the beginning of the name), best matches first.
+    """
+    if graph is not None:
+        index = graph.name_index()
+        lookup = graph.person_ids_for_name
+    else:
+        index = name_index
+        lookup = lambda other: sorted(names[other])
+
+    person_ids = []
+    for other in index.search(name, limit):
+        person_ids.extend(lookup(other))
+    return person_ids[:limit]
+
+
+def within(source, target, max_degrees):
+    """
+    Returns whether two people are at most `max_degrees` apart.
+
+    With a landmark index loaded most pairs are answered from the
+    distance bounds alone; the others fall back to a search.
+    """
+    if not connected(source, target):
+        return False
+    if graph is not None and graph.landmarks is not None:
+        answer = graph.landmarks.within(graph.person_index(source),
+                                        graph.person_index(target), max_degrees)
+        if answer is not None:
+            return answer
+    path = shortest_path(source, target, max_degrees=max_degrees)
+    return path is not None and not isinstance(path, Unknown)
+
+
+def connected(source, target):
+    """
+    Returns whether two people are in the same connected component.
+    """
+    if graph is not None:
+        return graph.connected(graph.person_index(source),
+                               graph.person_index(target))
+    return people[source]["component"] == people[target]["component"]
+
+
+def component_size(person_id):
+    """
+    Returns how many people are in the connected component of a person.
+    """
+    if graph is not None:
+        return graph.component_size(person_id)
+    return component_sizes[people[person_id]["component"]]
+
+
+def person_for_id(person_id):
+    """
+    Returns the name and birth of a person, whichever engine is loaded.
+    """
+    if graph is not None:
+        return graph.person(person_id)
+    return people[person_id]
+
+
+def movie_for_id(movie_id):
+    """
+    Returns the title and year of a movie, whichever engine is loaded.
+    """
+    if graph is not None:
+        return graph.movie(movie_id)
+    return movies[movie_id]
+
 
 def neighbors_for_person(person_id):
     """
@@ -0,0 +1,494 @@
+import csv
+import multiprocessing
+import os
+from array import array
+from collections import deque
+
+from nameindex import NameIndex
+from snapshot import StringTable, read_snapshot, write_snapshot
+from util import (DisjointSet, Unknown, bidirectional_search, build_csr,
+                  expired, lower_bound)
+
+
+class Graph():
+    """
+    Grafo compacto de pessoas e filmes.
+
+    Os ids do IMDB são mapeados para inteiros densos e as adjacências
+    pessoa→filmes e filme→estrelas ficam em arrays no formato CSR
+    (offsets mais índices), em vez de dicionários de conjuntos de strings.
+
+    Todos os campos são arrays ou tabelas de strings, de modo que o grafo
+    pode ser gravado em um snapshot e mapeado de volta em memória sem
+    reconstruir nenhum objeto Python por pessoa.
+    """
+
+    # Nome de cada seção do snapshot e o atributo correspondente
+    TABLES = ("person_ids", "person_names", "person_births",
+              "movie_ids", "movie_titles", "movie_years")
+    ARRAYS = ("person_order", "movie_order", "name_order",
+              "person_offsets", "person_movies",
+              "movie_offsets", "movie_stars",
+              "person_component", "component_sizes",
+              "name_offsets", "name_postings", "name_groups")
+
+    # Seções opcionais, presentes só depois de build_costars
+    COSTAR_ARRAYS = ("costar_offsets", "costars", "costar_movies")
+
+    def __init__(self):
+        # Tabelas de strings, indexadas pelo inteiro denso
+        for name in self.TABLES:
+            setattr(self, name, StringTable.from_strings([]))
+
+        # Índices ordenados por id e por nome em minúsculas, para busca binária
+        self.person_order = array("i")
+        self.movie_order = array("i")
+        self.name_order = array("i")
+
+        # Adjacências CSR
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("i", [0])
+        self.movie_stars = array("i")
+
+        # Componente conexo de cada pessoa e tamanho de cada componente
+        self.person_component = array("i")
+        self.component_sizes = array("i")
+
+        # Baldes de 4-gramas dos nomes, ver nameindex.NameIndex
+        self.name_offsets = array("i", [0])
+        self.name_postings = array("i")
+        self.name_groups = array("i")
+
+        # Adjacência pessoa→co-estrelas opcional, com um filme representante
+        # por co-estrela; vazia até build_costars ser chamado
+        self.costar_offsets = None
+        self.costars = None
+        self.costar_movies = None
+
+        # Índice de landmarks opcional (landmarks.LandmarkIndex)
+        self.landmarks = None
+
+        # Cache opcional de árvores de busca por origem (bfscache.BFSTreeCache)
+        self.tree_cache = None
+
+    @classmethod
+    def load(cls, directory, use_snapshot=True, use_costars=False):
+        """
+        Carrega o grafo de `directory`.
+
+        Usa o snapshot binário gravado ao lado dos CSVs quando ele existe e
+        está em dia; caso contrário lê os CSVs e grava um snapshot novo.
+        Com use_costars=True usa também a adjacência de co-estrelas,
+        calculando-a (e regravando o snapshot) se ela ainda não existir;
+        sem ele, a que estiver no snapshot é ignorada.
+        """
+        graph = None
+        if use_snapshot:
+            sections = read_snapshot(directory)
+            if sections is not None:
+                graph = cls.from_sections(sections, use_costars)
+
+        changed = graph is None
+        if graph is None:
+            graph = cls.from_csv(directory)
+        if use_costars and graph.costars is None:
+            graph.build_costars()
+            changed = True
+
+        if use_snapshot and changed:
+            try:
+                write_snapshot(directory, graph.sections())
+            except OSError:
+                pass
+        return graph
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Constrói o grafo a partir dos arquivos CSV de `directory`.
+        """
+        graph = cls()
+        person_ids, person_names, person_births = [], [], []
+        movie_ids, movie_titles, movie_years = [], [], []
+        person_index = {}
+        movie_index = {}
+
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                person_index[row["id"]] = len(person_ids)
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(row["birth"])
+
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                movie_index[row["id"]] = len(movie_ids)
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(row["year"])
+
+        star_people = array("i")
+        star_movies = array("i")
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                try:
+                    person = person_index[row["person_id"]]
+                    movie = movie_index[row["movie_id"]]
+                except KeyError:
+                    continue
+                star_people.append(person)
+                star_movies.append(movie)
+
+        graph.person_ids = StringTable.from_strings(person_ids)
+        graph.person_names = StringTable.from_strings(person_names)
+        graph.person_births = StringTable.from_strings(person_births)
+        graph.movie_ids = StringTable.from_strings(movie_ids)
+        graph.movie_titles = StringTable.from_strings(movie_titles)
+        graph.movie_years = StringTable.from_strings(movie_years)
+
+        graph.person_order = array("i", sorted(
+            range(len(person_ids)), key=person_ids.__getitem__))
+        graph.movie_order = array("i", sorted(
+            range(len(movie_ids)), key=movie_ids.__getitem__))
+        graph.name_order = array("i", sorted(
+            range(len(person_names)), key=lambda i: person_names[i].lower()))
+
+        index = NameIndex.build(SortedNames(graph))
+        graph.name_offsets, graph.name_postings = index.offsets, index.postings
+        graph.name_groups = index.groups
+
+        graph.person_offsets, graph.person_movies = build_csr(
+            len(person_ids), star_people, star_movies
+        )
+        graph.movie_offsets, graph.movie_stars = build_csr(
+            len(movie_ids), star_movies, star_people
+        )
+
+        # Une as estrelas de cada filme para rotular os componentes
+        components = DisjointSet(len(person_ids))
+        for person, movie in zip(star_people, star_movies):
+            components.union(person, graph.movie_stars[graph.movie_offsets[movie]])
+        graph.person_component, graph.component_sizes = components.labels()
+        return graph
+
+    @classmethod
+    def from_sections(cls, sections, use_costars=False):
+        """
+        Reconstrói o grafo a partir das seções de um snapshot, com a
+        adjacência de co-estrelas só se `use_costars` for verdadeiro.
+        """
+        graph = cls()
+        for name in cls.TABLES:
+            table = StringTable(sections[f"{name}.data"],
+                                sections[f"{name}.offsets"])
+            setattr(graph, name, table)
+        for name in cls.ARRAYS:
+            setattr(graph, name, sections[name])
+        if use_costars and all(name in sections for name in cls.COSTAR_ARRAYS):
+            for name in cls.COSTAR_ARRAYS:
+                setattr(graph, name, sections[name])
+        return graph
+
+    def sections(self):
+        """Retorna as seções (nome -> array ou bytes) a gravar no snapshot."""
+        sections = {}
+        for name in self.TABLES:
+            table = getattr(self, name)
+            sections[f"{name}.data"] = table.data
+            sections[f"{name}.offsets"] = table.offsets
+        for name in self.ARRAYS:
+            sections[name] = getattr(self, name)
+        if self.costars is not None:
+            for name in self.COSTAR_ARRAYS:
+                sections[name] = getattr(self, name)
+        return sections
+
+    def build_costars(self, workers=None):
+        """
+        Calcula a adjacência pessoa→co-estrelas: cada co-estrela aparece uma
+        única vez, com um filme que as duas pessoas fizeram juntas, e a
+        própria pessoa fica de fora.
+
+        As pessoas são divididas em faixas calculadas em paralelo por
+        processos que herdam o grafo via fork.
+        """
+        size = len(self.person_ids)
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+            workers = 1
+
+        step = max(1, -(-size // (workers * 4)))
+        ranges = [(first, min(first + step, size)) for first in range(0, size, step)]
+        if workers == 1 or len(ranges) == 1:
+            chunks = [costars_for_range(self, first, last) for first, last in ranges]
+        else:
+            # Os workers leem o grafo deste processo via copy-on-write
+            global shared_graph
+            shared_graph = self
+            try:
+                context = multiprocessing.get_context("fork")
+                with context.Pool(workers) as pool:
+                    chunks = pool.map(shared_costars_for_range, ranges)
+            finally:
+                shared_graph = None
+
+        offsets = array("i", [0])
+        costars = array("i")
+        costar_movies = array("i")
+        for counts, people, movies in chunks:
+            base = len(costars)
+            offsets.extend(base + count for count in counts)
+            costars.extend(people)
+            costar_movies.extend(movies)
+        self.costar_offsets = offsets
+        self.costars = costars
+        self.costar_movies = costar_movies
+
+    def person_index(self, person_id):
+        """Retorna o inteiro denso de `person_id`; KeyError se não existir."""
+        order = self.person_order
+        i = lower_bound(order, self.person_ids.__getitem__, person_id)
+        if i == len(order) or self.person_ids[order[i]] != person_id:
+            raise KeyError(person_id)
+        return order[i]
+
+    def movie_index(self, movie_id):
+        """Retorna o inteiro denso de `movie_id`; KeyError se não existir."""
+        order = self.movie_order
+        i = lower_bound(order, self.movie_ids.__getitem__, movie_id)
+        if i == len(order) or self.movie_ids[order[i]] != movie_id:
+            raise KeyError(movie_id)
+        return order[i]
+
+    def person_ids_for_name(self, name):
+        """Retorna os ids de todas as pessoas com o nome dado."""
+        name = name.lower()
+        names = self.person_names
+        order = self.name_order
+        person_ids = []
+        i = lower_bound(order, lambda person: names[person].lower(), name)
+        while i < len(order) and names[order[i]].lower() == name:
+            person_ids.append(self.person_ids[order[i]])
+            i += 1
+        return person_ids
+
+    def connected(self, person, other):
+        """Diz em O(1) se duas pessoas (inteiros) estão no mesmo componente."""
+        return self.person_component[person] == self.person_component[other]
+
+    def component_size(self, person_id):
+        """Número de pessoas no componente conexo de `person_id`."""
+        person = self.person_index(person_id)
+        return self.component_sizes[self.person_component[person]]
+
+    def name_index(self):
+        """Índice de nomes para buscas por prefixo e aproximadas."""
+        return NameIndex(SortedNames(self), self.name_offsets, self.name_postings,
+                         self.name_groups)
+
+    def person(self, person_id):
+        """Retorna o nome e o ano de nascimento de uma pessoa."""
+        i = self.person_index(person_id)
+        return {"name": self.person_names[i], "birth": self.person_births[i]}
+
+    def movie(self, movie_id):
+        """Retorna o título e o ano de um filme."""
+        i = self.movie_index(movie_id)
+        return {"title": self.movie_titles[i], "year": self.movie_years[i]}
+
+    def neighbors(self, person):
+        """
+        Gera os pares (filme, pessoa), em inteiros, de quem atuou
+        com `person`.
+        """
+        if self.costars is not None:
+            costars = self.costars
+            costar_movies = self.costar_movies
+            for k in range(self.costar_offsets[person], self.costar_offsets[person + 1]):
+                yield costar_movies[k], costars[k]
+            return
+
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        person_movies = self.person_movies
+        for k in range(self.person_offsets[person], self.person_offsets[person + 1]):
+            movie = person_movies[k]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+    def shortest_path(self, source, target, bidirectional=False, stats=None,
+                      max_degrees=None, deadline=None):
+        """
+        Caminho mais curto entre duas pessoas.
+
+        Recebe e retorna ids do IMDB, assim como `degrees.shortest_path`:
+        a lista de pares (movie_id, person_id) de `source` até `target`,
+        None se não houver caminho, ou Unknown se a busca parar em
+        `max_degrees` ou no `deadline`. Usa a busca bidirecional, o cache
+        de árvores ou a busca podada pelos landmarks quando pedidos ou
+        carregados, e a busca em largura sobre os arrays CSR nos demais
+        casos.
+        """
+        start = self.person_index(source)
+        goal = self.person_index(target)
+
+        # Pessoas em componentes diferentes nunca se conectam
+        if not self.connected(start, goal):
+            if stats is not None:
+                stats["explored"] = 0
+            return None
+
+        if bidirectional:
+            path = bidirectional_search(start, goal, self.neighbors, stats,
+                                        max_degrees, deadline)
+        elif self.tree_cache is not None:
+            path = self.tree_cache.shortest_path(start, goal, stats,
+                                                 max_degrees, deadline)
+        elif self.landmarks is not None:
+            path = self.landmarks.shortest_path(self, start, goal, stats,
+                                                max_degrees, deadline)
+        else:
+            return self.breadth_first_path(start, goal, stats,
+                                           max_degrees, deadline)
+
+        if path is None or isinstance(path, Unknown):
+            return path
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+    def breadth_first_path(self, start, goal, stats=None, max_degrees=None,
+                           deadline=None):
+        """
+        Busca em largura entre duas pessoas (inteiros) direto sobre os
+        arrays CSR; retorna pares (movie_id, person_id), None ou Unknown.
+        """
+        explored = 0
+        if stats is not None:
+            stats["explored"] = explored
+        if start == goal:
+            return []
+
+        # Para cada pessoa alcançada guarda (pessoa anterior, filme, profundidade)
+        parents = {start: (-1, -1, 0)}
+        frontier = deque([start])
+
+        # Com a adjacência de co-estrelas cada aresta é vista uma vez só
+        if self.costars is not None:
+            costar_offsets = self.costar_offsets
+            costars = self.costars
+            costar_movies = self.costar_movies
+            while frontier:
+                person = frontier.popleft()
+                depth = parents[person][2]
+                if max_degrees is not None and depth >= max_degrees:
+                    return Unknown("max_degrees", max_degrees)
+                if expired(deadline):
+                    return Unknown("deadline", depth)
+                explored += 1
+                if stats is not None:
+                    stats["explored"] = explored
+                for k in range(costar_offsets[person], costar_offsets[person + 1]):
+                    star = costars[k]
+                    if star in parents:
+                        continue
+                    parents[star] = (person, costar_movies[k], depth + 1)
+                    if star == goal:
+                        return self.path_from_parents(parents, goal)
+                    frontier.append(star)
+            return None
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        while frontier:
+            person = frontier.popleft()
+            depth = parents[person][2]
+            if max_degrees is not None and depth >= max_degrees:
+                return Unknown("max_degrees", max_degrees)
+            if expired(deadline):
+                return Unknown("deadline", depth)
+            explored += 1
+            if stats is not None:
+                stats["explored"] = explored
+            for k in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[k]
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if star in parents:
+                        continue
+                    parents[star] = (person, movie, depth + 1)
+                    if star == goal:
+                        return self.path_from_parents(parents, goal)
+                    frontier.append(star)
+        return None
+
+    def path_from_parents(self, parents, goal):
+        """
+        Reconstrói o caminho até `goal` e traduz os inteiros de volta
+        para pares (movie_id, person_id).
+        """
+        path = []
+        person = goal
+        while True:
+            previous, movie, _ = parents[person]
+            if previous == -1:
+                break
+            path.append((self.movie_ids[movie], self.person_ids[person]))
+            person = previous
+        path.reverse()
+        return path
+
+
+class SortedNames():
+    """Nomes em minúsculas do grafo, na ordem de `name_order`."""
+
+    def __init__(self, graph):
+        self.names = graph.person_names
+        self.order = graph.name_order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, i):
+        return self.names[self.order[i]].lower()
+
+
+# Grafo lido pelos workers de build_costars, herdado via fork
+shared_graph = None
+
+
+def shared_costars_for_range(bounds):
+    return costars_for_range(shared_graph, *bounds)
+
+
+def costars_for_range(graph, first, last):
+    """
+    Co-estrelas das pessoas first..last-1. Retorna (counts, people,
+    movies), onde counts[i] é o fim das co-estrelas da pessoa first + i
+    dentro de people e movies.
+    """
+    person_offsets = graph.person_offsets
+    person_movies = graph.person_movies
+    movie_offsets = graph.movie_offsets
+    movie_stars = graph.movie_stars
+
+    counts = array("i")
+    people = array("i")
+    movies = array("i")
+    for person in range(first, last):
+        seen = {}
+        for k in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[k]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                star = movie_stars[j]
+                if star != person and star not in seen:
+                    seen[star] = movie
+        people.extend(seen)
+        movies.extend(seen.values())
+        counts.append(len(people))
+    return counts, people, movies
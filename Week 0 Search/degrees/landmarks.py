@@ -0,0 +1,208 @@
+"""
+Índice de landmarks para buscas limitadas e direcionadas ao objetivo.
+
+Guarda as distâncias (em graus) de algumas pessoas muito conectadas até
+todas as outras, como arrays de uint8. Pela desigualdade triangular, para
+qualquer landmark L:
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+o que dá limites inferior e superior para a separação sem nenhuma busca.
+Na busca, uma pessoa a profundidade p de um lado com p + |d(L, v) - d(L, t)|
+acima do limite superior não está em nenhum caminho mais curto e não é
+expandida.
+
+Uso: python degrees.py landmarks [directory] [--count N]
+"""
+
+import argparse
+from array import array
+
+from snapshot import read_snapshot, write_snapshot
+from util import Unknown, bidirectional_search
+
+LANDMARKS_NAME = "degrees.landmarks"
+
+# Distância usada para pessoas inalcançáveis (ou a 255 graus ou mais)
+UNREACHABLE = 255
+
+# Landmarks usados para podar a fronteira de cada consulta
+ACTIVE_LANDMARKS = 8
+
+
+class LandmarkIndex():
+
+    def __init__(self, size, landmarks, distances):
+        # Número de pessoas no grafo
+        self.size = size
+        # Inteiro denso de cada landmark
+        self.landmarks = landmarks
+        # Distâncias achatadas: a do landmark l até v fica em [l * size + v]
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=32):
+        """
+        Escolhe até `count` landmarks entre as pessoas com mais
+        co-estrelas, evitando vizinhos diretos de landmarks já escolhidos,
+        e calcula as distâncias de cada um por busca em largura.
+        """
+        size = len(graph.person_ids)
+        degree = array("i", [0]) * size
+        for person in range(size):
+            for k in range(graph.person_offsets[person], graph.person_offsets[person + 1]):
+                movie = graph.person_movies[k]
+                degree[person] += (graph.movie_offsets[movie + 1]
+                                   - graph.movie_offsets[movie] - 1)
+        candidates = sorted(range(size), key=degree.__getitem__, reverse=True)
+
+        landmarks = array("i")
+        distances = array("B")
+        for person in candidates:
+            if len(landmarks) == count or degree[person] == 0:
+                break
+
+            # Landmarks colados uns nos outros dão limites redundantes
+            if any(distances[l * size + person] <= 1 for l in range(len(landmarks))):
+                continue
+            landmarks.append(person)
+            distances.extend(breadth_first_distances(graph, person))
+        return cls(size, landmarks, distances)
+
+    @classmethod
+    def load(cls, directory):
+        """Lê o índice gravado em `directory`; None se não houver um válido."""
+        sections = read_snapshot(directory, LANDMARKS_NAME)
+        if sections is None:
+            return None
+        return cls(sections["size"][0], sections["landmarks"], sections["distances"])
+
+    def save(self, directory):
+        write_snapshot(directory, {
+            "size": array("q", [self.size]),
+            "landmarks": array("i", self.landmarks),
+            "distances": array("B", self.distances),
+        }, LANDMARKS_NAME)
+
+    def column(self, person):
+        """Distâncias de todos os landmarks até `person`."""
+        return [self.distances[l * self.size + person]
+                for l in range(len(self.landmarks))]
+
+    def bounds(self, source, target):
+        """
+        Retorna (inferior, superior) para a distância entre duas pessoas
+        (inteiros). O superior é None quando nenhum landmark alcança as duas.
+        """
+        lower, upper = 0, None
+        for a, b in zip(self.column(source), self.column(target)):
+            if a == UNREACHABLE or b == UNREACHABLE:
+                continue
+            lower = max(lower, abs(a - b))
+            if upper is None or a + b < upper:
+                upper = a + b
+        return lower, upper
+
+    def within(self, source, target, degrees):
+        """
+        True ou False se os limites bastam para dizer se `source` e
+        `target` estão a no máximo `degrees` graus; None se não bastam.
+        """
+        lower, upper = self.bounds(source, target)
+        if lower > degrees:
+            return False
+        if upper is not None and upper <= degrees:
+            return True
+        return None
+
+    def shortest_path(self, graph, start, goal, stats=None, max_degrees=None,
+                      deadline=None):
+        """
+        Busca em largura bidirecional entre duas pessoas (inteiros) que não
+        expande quem, pelos limites dos landmarks, não pode estar em um
+        caminho mais curto.
+
+        Retorna a lista de pares (filme, pessoa) em inteiros, None, ou
+        Unknown se a busca parar em `max_degrees` ou no `deadline`.
+        """
+        lower, upper = self.bounds(start, goal)
+        if max_degrees is not None and lower > max_degrees:
+            if stats is not None:
+                stats["explored"] = 0
+            return Unknown("max_degrees", max_degrees)
+        if upper is None:
+            return bidirectional_search(start, goal, graph.neighbors, stats,
+                                        max_degrees, deadline)
+
+        # Só os landmarks que mais separam as duas pessoas entram no corte,
+        # que é feito para cada pessoa da fronteira
+        columns = {start: self.column(start), goal: self.column(goal)}
+        active = sorted(
+            (l for l in range(len(self.landmarks))
+             if UNREACHABLE not in (columns[start][l], columns[goal][l])),
+            key=lambda l: abs(columns[start][l] - columns[goal][l]),
+            reverse=True)[:ACTIVE_LANDMARKS]
+        size = self.size
+        distances = self.distances
+
+        def prune(person, depth, other):
+            # Mais longe que o limite superior não está em um caminho mínimo
+            column = columns[other]
+            for l in active:
+                a = distances[l * size + person]
+                if a != UNREACHABLE and depth + abs(a - column[l]) > upper:
+                    return True
+            return False
+
+        return bidirectional_search(start, goal, graph.neighbors, stats,
+                                    max_degrees, deadline, prune)
+
+
+def breadth_first_distances(graph, source):
+    """
+    Distâncias (uint8, saturadas em UNREACHABLE) de `source` até todas as
+    pessoas, expandindo cada filme uma única vez.
+    """
+    distances = array("B", [UNREACHABLE]) * len(graph.person_ids)
+    seen_movies = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier and depth + 1 < UNREACHABLE:
+        depth += 1
+        next_frontier = []
+        for person in frontier:
+            for k in range(graph.person_offsets[person], graph.person_offsets[person + 1]):
+                movie = graph.person_movies[k]
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for j in range(graph.movie_offsets[movie], graph.movie_offsets[movie + 1]):
+                    star = graph.movie_stars[j]
+                    if distances[star] == UNREACHABLE:
+                        distances[star] = depth
+                        next_frontier.append(star)
+        frontier = next_frontier
+    return distances
+
+
+def main(argv=None):
+    # Importado aqui porque degrees.py importa este módulo
+    import degrees
+
+    parser = argparse.ArgumentParser(
+        prog="degrees.py landmarks",
+        description="Build and save the landmark distance index.",
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--count", type=int, default=32,
+                        help="number of landmarks (default: 32)")
+    args = parser.parse_args(argv)
+
+    print("Loading data...")
+    degrees.load_data(args.directory, engine="csr")
+    print("Data loaded.")
+
+    index = LandmarkIndex.build(degrees.graph, args.count)
+    index.save(args.directory)
+    print(f"Saved {len(index.landmarks)} landmarks.")
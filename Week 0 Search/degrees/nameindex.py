@@ -0,0 +1,373 @@
+"""
+Índice de nomes para buscas por prefixo e com erros de digitação.
+
+Os nomes (em minúsculas) ficam em uma sequência ordenada, o que resolve
+buscas exatas e por prefixo com busca binária. Para buscas aproximadas,
+cada sequência de GRAM letras do nome (um 4-grama) cai em um de
+NAME_BUCKETS baldes, guardados em formato CSR (offsets mais posições),
+que pode ir para o snapshot junto com a marcação dos baldes iguais.
+
+Cada edição destrói no máximo 4 dos 4-gramas, então um nome a até k edições
+da consulta aparece em pelo menos b - 4k dos b baldes dela, e portanto em
+algum dos 4k + 1 mais raros. Os candidatos saem desses baldes e são
+contados nos outros, do mais raro ao mais comum, descartando quem já não
+pode chegar a b - 4k; só os que sobram têm o nome lido e a distância de
+edição conferida.
+
+Para o custo de uma consulta não crescer com o tamanho do índice, há três
+limites: se os baldes mais raros somam mais de MAX_POSTINGS posições, a
+consulta tolera menos edições; a contagem para quando os próximos baldes
+custariam mais de MAX_WORK posições, contando quem falta neles como
+presente; e no máximo MAX_CANDIDATES nomes têm a distância conferida.
+"""
+
+import zlib
+from array import array
+from bisect import bisect_left
+
+from snapshot import read_snapshot, write_snapshot
+from util import build_csr, lower_bound
+
+# Arquivo do índice da engine dict, gravado ao lado dos CSVs (a engine csr
+# guarda os baldes no próprio snapshot do grafo)
+NAMES_NAME = "degrees.names"
+
+NAME_BUCKETS = 1 << 18
+
+# Tamanho dos n-gramas: com 4 letras os baldes de dígitos e de pedaços
+# comuns de sobrenome ficam bem menores que com trigramas
+GRAM = 4
+
+# Posições que uma consulta aproximada pode ler dos seus baldes mais raros
+MAX_POSTINGS = 3_000
+
+# Posições que a contagem dos candidatos pode ler nos baldes seguintes
+MAX_WORK = 10_000
+
+# Candidatos com a distância de edição conferida; acima disso ficam os que
+# aparecem em mais baldes da consulta
+MAX_CANDIDATES = 64
+
+# Com tão poucos candidatos a contagem para e as distâncias são conferidas
+FEW_CANDIDATES = 32
+
+
+def grams(name):
+    """
+    n-gramas distintos de um nome, com espaços marcando o começo e um
+    \\0 marcando o fim: assim o fim do nome não se confunde com o fim de
+    uma palavra, e "ana" não casa com todo "ana ..." na contagem.
+    """
+    padded = " " * (GRAM - 1) + name + "\0"
+    return {padded[i:i + GRAM] for i in range(len(padded) - GRAM + 1)}
+
+
+def bucket(gram):
+    # crc32 em vez de hash(), que muda a cada execução do Python
+    return zlib.crc32(gram.encode("utf-8")) % NAME_BUCKETS
+
+
+def edit_distance(a, b, limit):
+    """
+    Distância de Levenshtein entre `a` e `b`, ou limit + 1 assim que
+    ficar claro que ela passa de `limit`.
+
+    Só a faixa de largura 2 * limit + 1 em torno da diagonal é calculada,
+    depois de descartar o prefixo e o sufixo comuns.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+    if not a or not b:
+        return min(max(len(a), len(b)), limit + 1)
+
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i, x in enumerate(a, 1):
+        low = max(1, i - limit)
+        high = min(len(b), i + limit)
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        for j in range(low, high + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (x != b[j - 1]))
+        if min(current[low - 1:high + 1]) > limit:
+            return over
+        previous = current
+    return min(previous[-1], over)
+
+
+def contains(postings, start, end, position):
+    """Diz se `position` está em postings[start:end], que está em ordem."""
+    i = bisect_left(postings, position, start, end)
+    return i < end and postings[i] == position
+
+
+def first_groups(groups, max_distance):
+    """
+    Quantos dos grupos mais raros somam pelo menos 4k + 1 baldes: um nome a
+    até k edições está em pelo menos um deles.
+    """
+    weight = 0
+    for i, (_, _, group_weight) in enumerate(groups):
+        weight += group_weight
+        if weight > GRAM * max_distance:
+            return i + 1
+    return len(groups)
+
+
+def same_buckets(offsets, postings):
+    """
+    Para cada balde, o primeiro balde com exatamente as mesmas posições,
+    para que a consulta não precise comparar baldes inteiros.
+    """
+    groups = array("i")
+    seen = {}
+    for b in range(len(offsets) - 1):
+        start, end = offsets[b], offsets[b + 1]
+        # Tamanho e pontas separam quase todos os baldes; só os que
+        # coincidem nisso são comparados inteiros
+        key = (end - start, postings[start], postings[end - 1]) if end > start else ()
+        for other in seen.setdefault(key, []):
+            if postings[offsets[other]:offsets[other + 1]] == postings[start:end]:
+                groups.append(other)
+                break
+        else:
+            seen[key].append(b)
+            groups.append(b)
+    return groups
+
+
+class NameIndex():
+    """
+    `names` é uma sequência de nomes em minúsculas, em ordem; as buscas
+    retornam posições nessa sequência.
+    """
+
+    def __init__(self, names, offsets, postings, groups):
+        self.names = names
+        self.offsets = offsets
+        self.postings = postings
+        # Primeiro balde com as mesmas posições de cada balde
+        self.groups = groups
+
+    @classmethod
+    def build(cls, names):
+        sources = array("i")
+        targets = array("i")
+        for position in range(len(names)):
+            for gram in grams(names[position]):
+                sources.append(bucket(gram))
+                targets.append(position)
+        offsets, postings = build_csr(NAME_BUCKETS, sources, targets)
+        return cls(names, offsets, postings, same_buckets(offsets, postings))
+
+    @classmethod
+    def load(cls, directory, names):
+        """
+        Lê os baldes gravados em `directory` para `names`; None se não
+        houver um índice válido.
+        """
+        sections = read_snapshot(directory, NAMES_NAME)
+        if sections is None or sections["size"][0] != len(names):
+            return None
+        return cls(names, sections["offsets"], sections["postings"], sections["groups"])
+
+    def save(self, directory):
+        write_snapshot(directory, {
+            "size": array("q", [len(self.names)]),
+            "offsets": array("i", self.offsets),
+            "postings": array("i", self.postings),
+            "groups": array("i", self.groups),
+        }, NAMES_NAME)
+
+    def exact(self, name):
+        """Posições com exatamente o nome dado."""
+        return list(self._range(name, lambda other: other == name))
+
+    def prefix(self, prefix, limit=10):
+        """Até `limit` posições de nomes distintos que começam com `prefix`."""
+        matches = []
+        for position in self._range(prefix, lambda other: other.startswith(prefix)):
+            if matches and self.names[matches[-1]] == self.names[position]:
+                continue
+            if len(matches) == limit:
+                break
+            matches.append(position)
+        return matches
+
+    def _range(self, start, accept):
+        names = self.names
+        position = lower_bound(range(len(names)), names.__getitem__, start)
+        while position < len(names) and accept(names[position]):
+            yield position
+            position += 1
+
+    def fuzzy(self, name, max_distance=2, limit=10):
+        """
+        Até `limit` pares (distância, posição) de nomes a no máximo
+        `max_distance` edições de `name`, do mais próximo ao mais distante.
+
+        Se os baldes que seria preciso ler passam de MAX_POSTINGS posições,
+        a consulta é pouco seletiva e `max_distance` é reduzida até caber.
+        """
+        groups = self._groups(name)
+        return self._fuzzy(name, groups, self._distance(groups, max_distance), limit)
+
+    def _distance(self, groups, max_distance):
+        """
+        A maior distância até `max_distance` para a qual os baldes mais
+        raros de `groups` somam no máximo MAX_POSTINGS posições.
+        """
+        while max_distance > 0 and sum(
+                end - start for start, end, _ in
+                groups[:first_groups(groups, max_distance)]) > MAX_POSTINGS:
+            max_distance -= 1
+        return max_distance
+
+    def _fuzzy(self, name, groups, max_distance, limit):
+        """Como `fuzzy`, com os baldes da consulta já agrupados."""
+        matches = []
+        seen = set()
+        for position in self._candidates(groups, max_distance):
+            other = self.names[position]
+            if other in seen:
+                continue
+            seen.add(other)
+            distance = edit_distance(name, other, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, other, position))
+        matches.sort()
+        return [(distance, position) for distance, _, position in matches[:limit]]
+
+    def _groups(self, name):
+        """
+        Listas [início, fim, peso] dos baldes da consulta, da mais rara à
+        mais comum. Baldes com exatamente as mesmas posições (como os
+        4-gramas de uma palavra que só aparece inteira) são lidos uma vez
+        só, com peso igual ao número deles.
+        """
+        offsets = self.offsets
+        weights = {}
+        for b in {bucket(gram) for gram in grams(name)}:
+            group = self.groups[b]
+            weights[group] = weights.get(group, 0) + 1
+        return sorted(([offsets[group], offsets[group + 1], weight]
+                       for group, weight in weights.items()),
+                      key=lambda group: group[1] - group[0])
+
+    def _candidates(self, groups, max_distance):
+        """
+        Posições que podem estar a até `max_distance` edições da consulta
+        cujos baldes são `groups`, pela contagem de baldes compartilhados,
+        sem ler nenhum nome.
+        """
+        postings = self.postings
+        total = sum(weight for _, _, weight in groups)
+        needed = total - GRAM * max_distance
+
+        # Consultas com até 4k baldes não filtram nada, e aí nomes muito
+        # curtos podem escapar
+        if needed <= 0:
+            candidates = set()
+            for start, end, _ in groups:
+                candidates.update(postings[start:end])
+            return candidates
+
+        # levels[c] são os candidatos vistos em exatamente c baldes; assim
+        # contar e descartar são operações de conjunto, sem laço por posição
+        first = first_groups(groups, max_distance)
+        levels = [set() for _ in range(total + 1)]
+        alive = set()
+        remaining = total
+        work = 0
+        for i, (start, end, weight) in enumerate(groups):
+            remaining -= weight
+            if i < first:
+                found = set(postings[start:end])
+                hits = found & alive
+                levels[weight] |= found - hits
+                alive |= found
+            elif len(alive) <= FEW_CANDIDATES:
+                # Poucos candidatos: conferir a distância sai mais barato
+                # que continuar contando
+                break
+            elif min(end - start, 32 * len(alive)) + work > MAX_WORK:
+                # Os baldes seguintes são ainda maiores: quem falta neles
+                # conta como presente, o que só deixa passar mais nomes
+                break
+            elif end - start > 32 * len(alive):
+                # Balde grande: busca binária de cada candidato, que está
+                # em ordem dentro do balde
+                hits = {position for position in alive
+                        if contains(postings, start, end, position)}
+            else:
+                hits = alive.intersection(postings[start:end])
+            if i >= first:
+                work += min(end - start, 32 * len(alive))
+            # Do nível mais alto ao mais baixo, para ninguém subir duas vezes
+            for count in range(total - weight, 0, -1):
+                if not hits:
+                    break
+                moved = levels[count] & hits
+                if moved:
+                    hits -= moved
+                    levels[count] -= moved
+                    levels[count + weight] |= moved
+            # Quem está em c baldes pode chegar no máximo a c + remaining
+            for count in range(1, min(needed - remaining, total + 1)):
+                if levels[count]:
+                    alive -= levels[count]
+                    levels[count] = set()
+            if not alive and i >= first - 1:
+                break
+
+        # Os que aparecem em mais baldes primeiro, até MAX_CANDIDATES
+        candidates = []
+        for level in reversed(levels):
+            candidates.extend(level)
+            if len(candidates) >= MAX_CANDIDATES:
+                return candidates[:MAX_CANDIDATES]
+        return candidates
+
+    def search(self, name, limit=10):
+        """
+        Nomes candidatos para um nome digitado, já ordenados: primeiro os
+        mais próximos em distância de edição e, entre eles, os mais curtos.
+        Se o texto é o começo de algum nome, as sugestões são esses nomes,
+        dos mais curtos aos mais longos.
+        """
+        name = " ".join(name.lower().split())
+        # Com um nome exato não é preciso procurar erros de digitação
+        if self.exact(name):
+            ranked = [name]
+            for position in self.prefix(name, limit + 1):
+                if self.names[position] != name:
+                    ranked.append(self.names[position])
+            return ranked[:limit]
+        # Um texto que já é o começo de algum nome está sendo completado; um
+        # erro que só apaga o fim do nome também deixa o nome certo aqui
+        completions = [self.names[position] for position in self.prefix(name, limit)]
+        if completions:
+            return sorted(completions, key=lambda other: (len(other), other))
+        # Consultas curtas aceitam menos erros, senão quase tudo é candidato.
+        # A distância 2 só é procurada se nada estiver a uma edição, o que
+        # lê bem menos baldes
+        max_distance = 0 if len(name) <= 3 else 1 if len(name) <= 8 else 2
+        groups = self._groups(name)
+        matches = []
+        for distance in range(1, self._distance(groups, max_distance) + 1):
+            matches = self._fuzzy(name, groups, distance, limit)
+            if matches:
+                break
+        ranked = [(distance, len(self.names[position]), self.names[position])
+                  for distance, position in matches]
+        return [other for _, _, other in sorted(ranked)]
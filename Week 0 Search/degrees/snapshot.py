@@ -0,0 +1,142 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+
+# Incrementar sempre que o conteúdo ou o layout das seções mudar
+SNAPSHOT_VERSION = 5
+
+SNAPSHOT_NAME = "degrees.snapshot"
+MAGIC = b"DEGSNAP\0"
+PREAMBLE = struct.Struct("<II")
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+ALIGNMENT = 8
+
+
+class StringTable():
+    """
+    Sequência de strings guardada em um único bloco de bytes UTF-8
+    mais um array de offsets, para poder ser mapeada em memória.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        data = bytearray()
+        offsets = array("q", [0])
+        for string in strings:
+            data += string.encode("utf-8")
+            offsets.append(len(data))
+        return cls(bytes(data), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+def snapshot_path(directory, name=SNAPSHOT_NAME):
+    return os.path.join(directory, name)
+
+
+def source_stamps(directory):
+    """Tamanho e mtime de cada CSV, usados para invalidar o snapshot."""
+    stamps = {}
+    for name in SOURCES:
+        info = os.stat(os.path.join(directory, name))
+        stamps[name] = [info.st_size, info.st_mtime_ns]
+    return stamps
+
+
+def write_snapshot(directory, sections, name=SNAPSHOT_NAME):
+    """
+    Grava `sections` (nome -> array ou bytes) no snapshot `name` de
+    `directory`.
+
+    O arquivo tem um cabeçalho JSON com a versão, os carimbos dos CSVs e a
+    posição de cada seção, seguido das seções alinhadas em 8 bytes.
+    """
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "sources": source_stamps(directory),
+        "sections": {},
+    }
+
+    # Arrays, bytes e seções de outro snapshot viram memoryviews tipadas
+    sections = {key: memoryview(section) for key, section in sections.items()}
+
+    # Calcula as posições relativas ao fim do cabeçalho
+    position = 0
+    for key, section in sections.items():
+        header["sections"][key] = [section.format, position, len(section)]
+        position += section.nbytes + (-section.nbytes) % ALIGNMENT
+
+    encoded = json.dumps(header).encode("utf-8")
+    start = len(MAGIC) + PREAMBLE.size + len(encoded)
+    start += (-start) % ALIGNMENT
+
+    # Escreve em um arquivo temporário e troca de uma vez só
+    path = snapshot_path(directory, name)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(PREAMBLE.pack(SNAPSHOT_VERSION, len(encoded)))
+        f.write(encoded)
+        f.write(b"\0" * (start - f.tell()))
+        for section in sections.values():
+            f.write(section)
+            f.write(b"\0" * ((-section.nbytes) % ALIGNMENT))
+    os.replace(temporary, path)
+
+
+def read_snapshot(directory, name=SNAPSHOT_NAME):
+    """
+    Mapeia o snapshot `name` de `directory` em memória.
+
+    Retorna um dicionário nome -> memoryview tipada, ou None se o
+    snapshot não existir, for de outra versão, estiver truncado ou
+    corrompido, ou se algum CSV mudou de tamanho ou mtime desde que foi
+    gravado.
+    """
+    try:
+        with open(snapshot_path(directory, name), "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        return None
+    try:
+        version, length = PREAMBLE.unpack_from(buffer, len(MAGIC))
+    except struct.error:
+        return None
+    if version != SNAPSHOT_VERSION:
+        return None
+    start = len(MAGIC) + PREAMBLE.size
+    try:
+        header = json.loads(buffer[start:start + length])
+        if header["sources"] != source_stamps(directory):
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+    start += length
+    start += (-start) % ALIGNMENT
+
+    # Um arquivo truncado ou corrompido também força a reconstrução
+    view = memoryview(buffer)
+    sections = {}
+    try:
+        for key, (typecode, position, count) in header["sections"].items():
+            size = count * array(typecode).itemsize
+            offset = start + position
+            if position < 0 or count < 0 or offset + size > len(buffer):
+                return None
+            sections[key] = view[offset:offset + size].cast(typecode)
+    except (TypeError, ValueError, KeyError, AttributeError):
+        return None
+    return sections
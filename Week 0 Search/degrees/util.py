@@ -1,4 +1,40 @@
+import heapq
+import itertools
+import time
+from array import array
+from collections import Counter, deque
+
+
+class Unknown():
+    """
+    Resposta de uma busca limitada que parou sem achar um caminho: a
+    separação é maior que `more_than` graus (ou as pessoas não estão
+    conectadas). `reason` diz qual limite foi atingido, "max_degrees" ou
+    "deadline".
+    """
+    __slots__ = ("reason", "more_than")
+
+    def __init__(self, reason, more_than):
+        self.reason = reason
+        self.more_than = more_than
+
+    def __eq__(self, other):
+        return (isinstance(other, Unknown)
+                and self.reason == other.reason
+                and self.more_than == other.more_than)
+
+    def __repr__(self):
+        return f"Unknown({self.reason!r}, more_than={self.more_than})"
+
+
+def expired(deadline):
+    """Diz se o prazo (em segundos de time.monotonic) já passou."""
+    return deadline is not None and time.monotonic() > deadline
+
+
 class Node():
+    __slots__ = ("state", "parent", "action")
+
     def __init__(self, state, parent, action):
         self.state = state
         self.parent = parent
@@ -36,3 +72,262 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class DequeStackFrontier():
+    """
+    Pilha com remoção e `contains_state` em O(1).
+
+    Os nós ficam em um deque e os estados presentes na fronteira em um
+    contador, para que estados repetidos continuem sendo encontrados.
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = Counter()
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] += 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            return self._discard(self.frontier.pop())
+
+    def _discard(self, node):
+        self.states[node.state] -= 1
+        if not self.states[node.state]:
+            del self.states[node.state]
+        return node
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            return self._discard(self.frontier.popleft())
+
+
+class PriorityFrontier(DequeStackFrontier):
+    """
+    Fronteira baseada em heap para buscas com custo (uniforme ou A*).
+
+    `add(node, priority)` e `remove()` são O(log n); entre prioridades
+    iguais sai primeiro o nó adicionado antes.
+    """
+
+    def __init__(self):
+        self.frontier = []
+        self.states = Counter()
+        self.counter = itertools.count()
+
+    def add(self, node, priority=0):
+        heapq.heappush(self.frontier, (priority, next(self.counter), node))
+        self.states[node.state] += 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            return self._discard(heapq.heappop(self.frontier)[2])
+
+
+def lower_bound(order, key, value):
+    """
+    Busca binária: primeira posição de `order` cuja chave não é menor
+    que `value`, onde a chave da posição i é key(order[i]).
+    """
+    low, high = 0, len(order)
+    while low < high:
+        middle = (low + high) // 2
+        if key(order[middle]) < value:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def build_csr(size, sources, targets):
+    """
+    Agrupa as arestas (sources[i], targets[i]) por origem no formato CSR.
+
+    Retorna (offsets, indices): os vizinhos do nó `n` ficam em
+    indices[offsets[n]:offsets[n + 1]].
+    """
+    offsets = array("i", [0]) * (size + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    indices = array("i", [0]) * len(sources)
+    position = array("i", offsets[:-1])
+    for source, target in zip(sources, targets):
+        indices[position[source]] = target
+        position[source] += 1
+    return offsets, indices
+
+
+class DisjointSet():
+    """
+    Union-find sobre os inteiros 0..size-1, com união por tamanho e
+    compressão de caminho por halving.
+    """
+
+    def __init__(self, size):
+        self.parent = array("i", range(size))
+        self.size = array("i", [1]) * size
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return a
+
+    def labels(self):
+        """
+        Retorna (labels, sizes): o componente de cada elemento, numerado
+        de 0 em diante, e o tamanho de cada componente.
+        """
+        labels = array("i", [-1]) * len(self.parent)
+        sizes = array("i")
+        roots = {}
+        for x in range(len(self.parent)):
+            root = self.find(x)
+            if root not in roots:
+                roots[root] = len(sizes)
+                sizes.append(self.size[root])
+            labels[x] = roots[root]
+        return labels, sizes
+
+
+def bidirectional_search(source, target, neighbors, stats=None,
+                         max_degrees=None, deadline=None, prune=None):
+    """
+    Busca em largura bidirecional de `source` até `target`.
+
+    `neighbors(state)` deve retornar pares (action, state) e as arestas
+    devem ser simétricas. A cada passo expande um nível inteiro da menor
+    das duas fronteiras até que elas se encontrem.
+
+    Retorna a lista de pares (action, state) do caminho mais curto, ou
+    None se não houver caminho. Se `stats` for um dicionário, grava em
+    stats["explored"] o número de estados expandidos. Com `max_degrees` ou
+    `deadline` (em time.monotonic) retorna Unknown ao atingir o limite.
+
+    Com `prune(state, depth, goal)`, os estados da fronteira para os quais
+    ela retorna True não são expandidos; `goal` é o estado do lado oposto.
+    Ela só pode descartar estados que não estão em nenhum caminho mais
+    curto entre `source` e `target`.
+    """
+    explored = 0
+    try:
+        if source == target:
+            return []
+
+        # Para cada lado: estado -> (estado anterior, ação, profundidade)
+        forward = {source: (None, None, 0)}
+        backward = {target: (None, None, 0)}
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+        # Profundidade já completa de cada lado: sem encontro, a distância
+        # é maior que a soma das duas
+        depths = {"forward": 0, "backward": 0}
+
+        while forward_frontier and backward_frontier:
+            reached = depths["forward"] + depths["backward"]
+            if max_degrees is not None and reached >= max_degrees:
+                return Unknown("max_degrees", max_degrees)
+
+            # Expande sempre o lado com a menor fronteira
+            if len(forward_frontier) <= len(backward_frontier):
+                parents, others = forward, backward
+                frontier = forward_frontier
+                goal = target
+            else:
+                parents, others = backward, forward
+                frontier = backward_frontier
+                goal = source
+            if prune is not None:
+                frontier = [state for state in frontier
+                            if not prune(state, parents[state][2], goal)]
+
+            # Expande o nível inteiro e guarda o melhor ponto de encontro
+            meeting = None
+            next_frontier = []
+            for state in frontier:
+                if expired(deadline):
+                    return Unknown("deadline", reached)
+                explored += 1
+                depth = parents[state][2] + 1
+                for action, neighbor in neighbors(state):
+                    if neighbor in others:
+                        length = depth + others[neighbor][2]
+                        if meeting is None or length < meeting[0]:
+                            meeting = (length, state, action, neighbor)
+                    if neighbor not in parents:
+                        parents[neighbor] = (state, action, depth)
+                        next_frontier.append(neighbor)
+
+            if meeting is not None:
+                _, state, action, neighbor = meeting
+                if parents is backward:
+                    # Encontro visto do lado do destino: inverte a aresta
+                    state, neighbor = neighbor, state
+                return _stitch(forward, backward, state, action, neighbor)
+
+            if parents is forward:
+                forward_frontier = next_frontier
+                depths["forward"] += 1
+            else:
+                backward_frontier = next_frontier
+                depths["backward"] += 1
+        return None
+    finally:
+        if stats is not None:
+            stats["explored"] = explored
+
+
+def _stitch(forward, backward, left, action, right):
+    """
+    Junta o caminho source→left, a aresta (left, right) e o caminho
+    right→target em uma lista de pares (action, state).
+    """
+    path = []
+    state = left
+    while forward[state][0] is not None:
+        previous, edge, _ = forward[state]
+        path.append((edge, state))
+        state = previous
+    path.reverse()
+
+    path.append((action, right))
+    state = right
+    while backward[state][0] is not None:
+        following, edge, _ = backward[state]
+        path.append((edge, following))
+        state = following
+    return path
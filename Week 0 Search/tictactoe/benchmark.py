@@ -0,0 +1,232 @@
+"""
+Benchmark de nós visitados pelo minimax do tictactoe.py.
+
+Resolve todas as posições alcançáveis (não terminais) do 3x3, sem o livro
+de aberturas e com a tabela de transposição vazia a cada posição, e
+compara com a busca original (janela nova em cada ação da raiz, sem ordem
+de jogadas e sem tabela), guardada aqui como referência.
+
+Com --parallel SIZE K, compara a busca do nxn.py em série e com as jogadas
+da raiz divididas entre processos, com profundidade fixa, ao longo de uma
+partida: as jogadas precisam ser as mesmas. Também mede quanto tempo leva
+cada jogada da raiz que iria para o pool e, distribuindo esses tempos entre
+2, 4 e 8 processos na ordem em que o pool os receberia, estima o ganho em
+máquinas com esses núcleos (sem o custo de comunicação com o pool).
+
+Uso:
+    python benchmark.py [--engines ...]
+    python benchmark.py --parallel SIZE K [--depth D] [--workers N] [--moves M]
+"""
+
+import argparse
+import heapq
+import math
+import os
+import time
+from concurrent.futures import Future
+
+import nxn
+import tictactoe as ttt
+
+
+def reference_minimax(board, stats):
+    """A busca original do tictactoe.py, contando nós em `stats`."""
+
+    def max_value(board, alpha, beta):
+        stats["nodes"] += 1
+        if ttt.terminal(board):
+            return ttt.utility(board)
+        v = -math.inf
+        for action in ttt.actions(board):
+            v = max(v, min_value(ttt.result(board, action), alpha, beta))
+            if v >= beta:
+                return v
+            alpha = max(alpha, v)
+        return v
+
+    def min_value(board, alpha, beta):
+        stats["nodes"] += 1
+        if ttt.terminal(board):
+            return ttt.utility(board)
+        v = math.inf
+        for action in ttt.actions(board):
+            v = min(v, max_value(ttt.result(board, action), alpha, beta))
+            if v <= alpha:
+                return v
+            beta = min(beta, v)
+        return v
+
+    maximizing = ttt.player(board) == ttt.X
+    best_score = None
+    best_action = None
+    for action in ttt.actions(board):
+        new_board = ttt.result(board, action)
+        if maximizing:
+            score = min_value(new_board, -math.inf, math.inf)
+        else:
+            score = -max_value(new_board, -math.inf, math.inf)
+        if best_score is None or score > best_score:
+            best_score = score
+            best_action = action
+    return best_action
+
+
+def search(board, stats):
+    ttt.transposition_table.clear()
+    ttt.killers.clear()
+    return ttt.search(board, stats)
+
+
+# Para comparar uma busca nova basta acrescentar uma entrada aqui
+ENGINES = {
+    "reference": reference_minimax,
+    "tictactoe": search,
+}
+
+
+def positions():
+    """Todas as posições não terminais alcançáveis a partir do início."""
+    seen = {}
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        key = str(board)
+        if key in seen or ttt.terminal(board):
+            continue
+        seen[key] = board
+        for action in ttt.actions(board):
+            stack.append(ttt.result(board, action))
+    return list(seen.values())
+
+
+def measure(engine, boards):
+    nodes = []
+    start = time.perf_counter()
+    for board in boards:
+        stats = {"nodes": 0}
+        ENGINES[engine](board, stats)
+        nodes.append(stats["nodes"])
+    return {
+        "engine": engine,
+        "positions": len(boards),
+        "seconds": round(time.perf_counter() - start, 2),
+        "empty_board_nodes": nodes[0],
+        "total_nodes": sum(nodes),
+        "mean_nodes": round(sum(nodes) / len(nodes), 1),
+        "max_nodes": max(nodes),
+    }
+
+
+class RecordingExecutor():
+    """
+    Executor que roda cada jogada da raiz na hora, neste processo, e anota
+    quanto tempo ela levou. `batches` agrupa as jogadas de cada chamada de
+    Search.root, que no pool rodariam juntas.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.last = None
+
+    def submit(self, function, *args):
+        # Jogadas de uma mesma chamada só diferem na casa (args[5])
+        key = args[:5] + args[6:]
+        if key != self.last:
+            self.batches.append([])
+            self.last = key
+        start = time.perf_counter()
+        future = Future()
+        future.set_result(function(*args))
+        self.batches[-1].append(time.perf_counter() - start)
+        return future
+
+
+def makespan(durations, workers):
+    """Tempo para `workers` processos terminarem as tarefas, dadas em ordem."""
+    free = [0.0] * workers
+    for duration in durations:
+        heapq.heappush(free, heapq.heappop(free) + duration)
+    return max(free)
+
+
+def parallel(size, win_length, depth, workers, moves):
+    """
+    Joga `moves` jogadas de uma partida do nxn.py, buscando cada posição
+    em série e em paralelo com profundidade `depth`.
+    """
+    nxn.options.update(size=size, win_length=win_length, time_budget=None, max_depth=depth)
+    board = nxn.initial_state()
+    times = {None: 0.0, workers: 0.0}
+    recorder = RecordingExecutor()
+    recorded = 0.0
+    same = True
+    for _ in range(moves):
+        if nxn.terminal(board):
+            break
+        chosen = {}
+        for count in times:
+            nxn.options["workers"] = count
+            # O pool é criado antes de medir
+            nxn.executor(count)
+            start = time.perf_counter()
+            chosen[count] = nxn.minimax(board)
+            times[count] += time.perf_counter() - start
+        same = same and chosen[None] == chosen[workers]
+
+        start = time.perf_counter()
+        search = nxn.Search(board, nxn.win_length(board))
+        search.best_move(nxn.player(board), depth, recorder)
+        recorded += time.perf_counter() - start
+        board = nxn.result(board, chosen[None])
+
+    # Processos a mais que núcleos só disputam o mesmo núcleo: o ganho
+    # medido aí não diz nada sobre a divisão da raiz
+    cores = len(os.sched_getaffinity(0))
+    print(f"{size}x{size}, {win_length} in a row, depth {depth}, {workers} workers, {cores} cores")
+    if workers > cores:
+        print(f"Warning: more workers than cores; run on a machine with at least "
+              f"{workers} cores to measure the speedup.")
+    print(f"serial {times[None]:.2f}s  parallel {times[workers]:.2f}s  "
+          f"speedup {times[None] / times[workers]:.2f}x  same moves: {same}")
+
+    # A primeira jogada de cada chamada continua em série; as outras rodam
+    # em paralelo, cada uma no primeiro processo livre
+    split = recorded - sum(map(sum, recorder.batches))
+    print("projected from the time of each root move, without pool overhead:")
+    for count in sorted({1, 2, 4, 8, workers}):
+        projected = split + sum(makespan(batch, count) for batch in recorder.batches)
+        print(f"  {count} cores: parallel {projected:.2f}s  "
+              f"speedup {times[None] / projected:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Node counts for tictactoe.py.")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--parallel", nargs=2, type=int, metavar=("SIZE", "K"),
+                        help="compare serial and parallel root split in nxn.py")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=len(os.sched_getaffinity(0)))
+    parser.add_argument("--moves", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.parallel:
+        parallel(*args.parallel, args.depth, args.workers, args.moves)
+        return
+
+    boards = positions()
+    # O tabuleiro vazio vai primeiro para aparecer na coluna própria
+    boards.sort(key=lambda board: sum(cell is not None for row in board for cell in row))
+    results = [measure(engine, boards) for engine in args.engines]
+
+    columns = ("engine", "positions", "seconds", "empty_board_nodes",
+               "total_nodes", "mean_nodes", "max_nodes")
+    widths = [max(len(column), *(len(str(result[column])) for result in results))
+              for column in columns]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print("  ".join(str(result[column]).ljust(width)
+                        for column, width in zip(columns, widths)))
+
+
+if __name__ == "__main__":
+    main()
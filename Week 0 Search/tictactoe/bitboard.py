@@ -0,0 +1,202 @@
+"""
+Motor de Tic Tac Toe com o tabuleiro em dois bitmasks.
+
+As casas de X e de O ficam em dois inteiros de 9 bits (a casa (i, j) é o
+bit 3 * i + j). De quem é a vez sai da paridade das peças, o vencedor de
+uma comparação com as 8 linhas pré-calculadas e jogadas são feitas e
+desfeitas com operações de bits, sem copiar nada.
+
+A API pública (initial_state, player, actions, result, winner, terminal,
+utility e minimax) recebe e devolve tabuleiros como listas de listas, igual
+ao tictactoe.py, então o runner.py pode usar qualquer um dos dois.
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+SIZE = 3
+FULL = (1 << SIZE * SIZE) - 1
+
+# As 8 linhas vencedoras: 3 linhas, 3 colunas e as 2 diagonais
+LINES = (
+    tuple(0b111 << 3 * row for row in range(SIZE))
+    + tuple(0b001001001 << col for col in range(SIZE))
+    + (0b100010001, 0b001010100)
+)
+
+# Tipos de entrada da tabela de transposição, como no tictactoe.py
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# (casas do jogador da vez, casas do outro) -> (valor, tipo), com o valor
+# do ponto de vista do jogador da vez
+transposition_table = {}
+
+
+def initial_state():
+    return [[EMPTY] * SIZE for _ in range(SIZE)]
+
+
+def encode(board):
+    """Converte um tabuleiro de listas no par de bitmasks (x, o)."""
+    x = o = 0
+    for row in range(SIZE):
+        for col in range(SIZE):
+            if board[row][col] == X:
+                x |= 1 << SIZE * row + col
+            elif board[row][col] == O:
+                o |= 1 << SIZE * row + col
+    return x, o
+
+
+def decode(x, o):
+    """Converte o par de bitmasks (x, o) em um tabuleiro de listas."""
+    return [[X if x >> SIZE * row + col & 1 else O if o >> SIZE * row + col & 1 else EMPTY
+             for col in range(SIZE)]
+            for row in range(SIZE)]
+
+
+def wins(mask):
+    """True se as casas de `mask` completam alguma linha."""
+    for line in LINES:
+        if mask & line == line:
+            return True
+    return False
+
+
+def moves(x, o):
+    """Bits das casas livres, em ordem."""
+    free = ~(x | o) & FULL
+    while free:
+        bit = free & -free
+        yield bit
+        free ^= bit
+
+
+def player(board):
+    x, o = encode(board)
+    return O if bin(x).count("1") > bin(o).count("1") else X
+
+
+def actions(board):
+    x, o = encode(board)
+    return {divmod(bit.bit_length() - 1, SIZE) for bit in moves(x, o)}
+
+
+def result(board, action):
+    x, o = encode(board)
+    row, col = action
+    if not 0 <= row < SIZE or not 0 <= col < SIZE:
+        raise Exception("Ação inválida")
+    bit = 1 << SIZE * row + col
+    if (x | o) & bit:
+        raise Exception("Ação inválida")
+    if bin(x).count("1") > bin(o).count("1"):
+        o |= bit
+    else:
+        x |= bit
+    return decode(x, o)
+
+
+def winner(board):
+    x, o = encode(board)
+    if wins(x):
+        return X
+    if wins(o):
+        return O
+    return None
+
+
+def terminal(board):
+    x, o = encode(board)
+    return wins(x) or wins(o) or x | o == FULL
+
+
+def utility(board):
+    x, o = encode(board)
+    return 1 if wins(x) else -1 if wins(o) else 0
+
+
+def count(stats, name):
+    if stats is not None:
+        stats[name] = stats.get(name, 0) + 1
+
+
+def negamax(mine, theirs, alpha, beta, stats=None):
+    """
+    Valor da posição para o jogador da vez (dono de `mine`), com poda
+    alfa-beta. Quem acabou de jogar foi o dono de `theirs`, então só ele
+    pode ter vencido. Os contadores são os mesmos do tictactoe.py.
+    """
+    count(stats, "nodes")
+    if wins(theirs):
+        return -1
+    if mine | theirs == FULL:
+        return 0
+
+    key = (mine, theirs)
+    entry = transposition_table.get(key)
+    count(stats, "tt_probes")
+    if entry is not None:
+        count(stats, "tt_hits")
+        value, bound = entry
+        if bound == EXACT:
+            return value
+        if bound == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+    window = (alpha, beta)
+
+    best = -2
+    free = ~(mine | theirs) & FULL
+    while free:
+        bit = free & -free
+        free ^= bit
+        # Joga e desfaz no mesmo inteiro
+        mine |= bit
+        value = -negamax(theirs, mine, -beta, -alpha, stats)
+        mine ^= bit
+        if value > best:
+            best = value
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                count(stats, "cutoffs")
+                break
+
+    if best <= window[0]:
+        transposition_table[key] = (best, UPPER)
+    elif best >= window[1]:
+        transposition_table[key] = (best, LOWER)
+    else:
+        transposition_table[key] = (best, EXACT)
+    return best
+
+
+def minimax(board, stats=None):
+    x, o = encode(board)
+    if wins(x) or wins(o) or x | o == FULL:
+        return None
+
+    # Importado aqui porque book.py importa este módulo
+    import book
+
+    move = book.lookup(board)
+    if move is not None:
+        count(stats, "book_hits")
+        return move
+
+    mine, theirs = (o, x) if bin(x).count("1") > bin(o).count("1") else (x, o)
+    best_score = -2
+    best_action = None
+    for bit in moves(mine, theirs):
+        score = -negamax(theirs, mine | bit, -2, 2, stats)
+        if score > best_score:
+            best_score = score
+            best_action = divmod(bit.bit_length() - 1, SIZE)
+    return best_action
@@ -0,0 +1,146 @@
+"""
+Livro de aberturas com o jogo perfeito para o Tic Tac Toe 3x3.
+
+O jogo tem só 5478 posições alcançáveis: o passo de build resolve todas
+uma única vez e grava, para cada uma, o valor (do ponto de vista de X) e
+as melhores jogadas. Cada posição vira um índice em base 3 (vazio 0, X 1,
+O 2, a casa (i, j) com peso 3 ** (3 * i + j)) em um array de 3 ** 9
+entradas uint16:
+
+    bit 15      posição resolvida
+    bits 9-10   valor + 1
+    bits 0-8    melhores jogadas, como bits de casas
+
+Uso: python book.py [--output FILE]
+"""
+
+import argparse
+import functools
+import os
+import struct
+from array import array
+
+from bitboard import FULL, SIZE, encode, moves, wins
+
+BOOK_NAME = "tictactoe.book"
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), BOOK_NAME)
+MAGIC = b"TTTBOOK\0"
+# Mágica, lado do tabuleiro e tamanho da linha vencedora
+HEADER = struct.Struct("<8sHH")
+
+ENTRIES = 3 ** (SIZE * SIZE)
+SOLVED = 1 << 15
+VALUE_SHIFT = 9
+MOVES = (1 << SIZE * SIZE) - 1
+
+
+def position(x, o):
+    """Índice em base 3 do par de bitmasks (x, o)."""
+    index = 0
+    for cell in reversed(range(SIZE * SIZE)):
+        index = index * 3 + (x >> cell & 1) + 2 * (o >> cell & 1)
+    return index
+
+
+def solve(x, o, entries):
+    """
+    Resolve a posição (x, o) e todas as alcançáveis a partir dela,
+    preenchendo `entries`. Retorna o valor do ponto de vista de X.
+    """
+    index = position(x, o)
+    if entries[index]:
+        return (entries[index] >> VALUE_SHIFT & 3) - 1
+
+    best_moves = 0
+    if wins(x):
+        value = 1
+    elif wins(o):
+        value = -1
+    elif x | o == FULL:
+        value = 0
+    else:
+        x_turn = bin(x).count("1") == bin(o).count("1")
+        values = {}
+        for bit in moves(x, o):
+            if x_turn:
+                values[bit] = solve(x | bit, o, entries)
+            else:
+                values[bit] = solve(x, o | bit, entries)
+        value = max(values.values()) if x_turn else min(values.values())
+        for bit, child in values.items():
+            if child == value:
+                best_moves |= bit
+
+    entries[index] = SOLVED | (value + 1) << VALUE_SHIFT | best_moves
+    return value
+
+
+def build():
+    entries = array("H", [0]) * ENTRIES
+    solve(0, 0, entries)
+    return entries
+
+
+def save(entries, path=BOOK_PATH):
+    # Escreve em um arquivo temporário e troca de uma vez só
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, SIZE, SIZE))
+        f.write(entries.tobytes())
+    os.replace(temporary, path)
+
+
+@functools.lru_cache(maxsize=None)
+def load(path=BOOK_PATH):
+    """Lê o livro gravado em `path`; None se não houver um válido."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) != HEADER.size + 2 * ENTRIES:
+        return None
+    if HEADER.unpack_from(data) != (MAGIC, SIZE, SIZE):
+        return None
+    entries = array("H")
+    entries.frombytes(data[HEADER.size:])
+    return entries
+
+
+def entry(board):
+    """Entrada do livro para `board`, ou None se não houver livro para ele."""
+    if len(board) != SIZE or any(len(row) != SIZE for row in board):
+        return None
+    entries = load()
+    if entries is None:
+        return None
+    value = entries[position(*encode(board))]
+    return value if value & SOLVED else None
+
+
+def lookup(board):
+    """
+    Melhor jogada (i, j) para `board` segundo o livro, ou None se o livro
+    não existir, for de outra variante ou a posição for terminal.
+    """
+    value = entry(board)
+    if value is None or not value & MOVES:
+        return None
+    best_moves = value & MOVES
+    bit = best_moves & -best_moves
+    return divmod(bit.bit_length() - 1, SIZE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the tic-tac-toe opening book.")
+    parser.add_argument("--output", default=BOOK_PATH)
+    args = parser.parse_args()
+
+    entries = build()
+    save(entries, args.output)
+    solved = sum(1 for value in entries if value)
+    print(f"Wrote {solved} positions to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
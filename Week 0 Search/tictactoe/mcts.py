@@ -0,0 +1,217 @@
+"""
+Motor de Monte Carlo Tree Search (UCT) para tabuleiros N x N.
+
+Para variantes grandes demais até para o aprofundamento iterativo do
+nxn.py. Cada iteração desce a árvore escolhendo o filho com maior
+
+    vitórias / visitas + c * sqrt(ln(visitas do pai) / visitas)
+
+expande uma jogada ainda não tentada, termina a partida com jogadas
+aleatórias e soma o resultado no caminho de volta. A
+jogada escolhida é a mais visitada da raiz.
+
+Tabuleiro, k, orçamento de tempo e processos são os de nxn.options (a API
+pública é a mesma), e as jogadas e a detecção de vitória são as da
+nxn.Search. A árvore fica guardada entre as jogadas: na jogada seguinte a
+busca continua a partir do neto correspondente. Com nxn.options["workers"]
+cada processo do pool monta a sua própria árvore (paralelismo de raiz) e
+as visitas da raiz são somadas.
+"""
+
+import math
+import random
+import time
+
+import nxn
+# A API pública (initial_state, player, actions, result, winner, terminal,
+# utility) é a do nxn.py
+from nxn import (EMPTY, O, X, Search, actions, initial_state, options, player,
+                 result, terminal, utility, win_length, winner)
+
+settings = {
+    # Iterações por processo; None usa só o orçamento de tempo
+    "iterations": None,
+    # Constante de exploração do UCT
+    "exploration": math.sqrt(2),
+}
+
+# Iterações por processo quando não há nem orçamento de tempo nem limite
+DEFAULT_ITERATIONS = 10_000
+
+rng = random.Random()
+
+# (casas da raiz, raiz) da última busca, para reaproveitar a árvore
+_tree = (None, None)
+
+
+class Node():
+    """
+    Uma posição da árvore. `turn` é quem joga nela; `wins` conta, do ponto
+    de vista de quem fez `move`, vitórias como 1 e empates como 1/2.
+    """
+
+    __slots__ = ("move", "parent", "turn", "children", "untried", "visits", "wins", "result")
+
+    def __init__(self, move, parent, turn):
+        self.move = move
+        self.parent = parent
+        self.turn = turn
+        self.children = {}
+        # Jogadas ainda não expandidas, sorteadas na primeira visita
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.0
+        # Vencedor (ou EMPTY para empate) se a posição é terminal, senão False
+        self.result = False
+
+
+def other(turn):
+    return O if turn == X else X
+
+
+def select(node, exploration):
+    log_visits = math.log(node.visits)
+    best = None
+    best_score = -math.inf
+    for child in node.children.values():
+        score = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+        if score > best_score:
+            best = child
+            best_score = score
+    return best
+
+
+def rollout(search, turn, played):
+    """
+    Joga ao acaso até o fim; retorna o vencedor ou EMPTY no empate. Uma
+    partida aleatória é só uma permutação aleatória das casas livres.
+    """
+    free = [cell for cell in search.order if search.cells[cell] == EMPTY]
+    rng.shuffle(free)
+    for cell in free:
+        search.play(cell, turn)
+        played.append(cell)
+        if search.completes(cell):
+            return turn
+        turn = other(turn)
+    return EMPTY
+
+
+def iterate(root, search, exploration):
+    """Uma iteração de seleção, expansão, simulação e retropropagação."""
+    node = root
+    played = []
+
+    while node.result is False and node.untried == [] and node.children:
+        node = select(node, exploration)
+        search.play(node.move, other(node.turn))
+        played.append(node.move)
+
+    if node.result is False:
+        if node.untried is None:
+            node.untried = search.candidates()
+            rng.shuffle(node.untried)
+        if node.untried:
+            move = node.untried.pop()
+            search.play(move, node.turn)
+            played.append(move)
+            child = Node(move, node, other(node.turn))
+            if search.completes(move):
+                child.result = node.turn
+            elif EMPTY not in search.cells:
+                child.result = EMPTY
+            node.children[move] = child
+            node = child
+        else:
+            node.result = EMPTY
+
+    outcome = node.result if node.result is not False else rollout(search, node.turn, played)
+    for cell in reversed(played):
+        search.undo(cell)
+
+    while node is not None:
+        node.visits += 1
+        if outcome == EMPTY:
+            node.wins += 0.5
+        elif outcome != node.turn:
+            node.wins += 1
+        node = node.parent
+
+
+def grow(root, board, deadline, iterations):
+    """Faz iterações em `root` até o limite de iterações ou o `deadline`."""
+    search = Search(board, win_length(board))
+    exploration = settings["exploration"]
+    count = 0
+    while iterations is None or count < iterations:
+        if deadline is not None and not count & 15 and time.monotonic() > deadline:
+            break
+        iterate(root, search, exploration)
+        count += 1
+    return count
+
+
+def root_visits(board, deadline, iterations, seed):
+    """Visitas de cada jogada da raiz em uma árvore nova, em um processo do pool."""
+    rng.seed(seed)
+    root = Node(None, None, player(board))
+    grow(root, board, deadline, iterations)
+    return {move: child.visits for move, child in root.children.items()}
+
+
+def reuse(board):
+    """
+    A subárvore da última busca que corresponde a `board`, se ele veio da
+    raiz dela por jogadas já expandidas; senão uma raiz nova.
+    """
+    cells, root = _tree
+    now = [cell for row in board for cell in row]
+    if cells is None or len(cells) != len(now):
+        return Node(None, None, player(board))
+    if any(cells[i] != EMPTY and cells[i] != now[i] for i in range(len(now))):
+        return Node(None, None, player(board))
+    added = {i for i in range(len(now)) if cells[i] == EMPTY and now[i] != EMPTY}
+
+    node = root
+    while added:
+        move = next((i for i in added if now[i] == node.turn), None)
+        if move is None or move not in node.children:
+            return Node(None, None, player(board))
+        added.discard(move)
+        node = node.children[move]
+    node.parent = None
+    return node
+
+
+def minimax(board, stats=None):
+    global _tree
+    if terminal(board):
+        return None
+
+    budget = options["time_budget"]
+    iterations = settings["iterations"]
+    if budget is None and iterations is None:
+        iterations = DEFAULT_ITERATIONS
+    deadline = None if budget is None else time.monotonic() + budget
+
+    root = reuse(board)
+    pool = nxn.executor(options["workers"])
+    futures = []
+    if pool is not None:
+        futures = [pool.submit(root_visits, board, deadline, iterations, rng.getrandbits(64))
+                   for _ in range(options["workers"] - 1)]
+    count = grow(root, board, deadline, iterations)
+
+    visits = {move: child.visits for move, child in root.children.items()}
+    for future in futures:
+        for move, worker_visits in future.result().items():
+            visits[move] = visits.get(move, 0) + worker_visits
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + count
+
+    # Sem nenhuma iteração completa, qualquer jogada livre serve
+    if not visits:
+        return min(actions(board))
+    move = max(visits, key=visits.get)
+    _tree = ([cell for row in board for cell in row], root)
+    return divmod(move, len(board))
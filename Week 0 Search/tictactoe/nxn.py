@@ -0,0 +1,356 @@
+"""
+Motor de Tic Tac Toe para tabuleiros N x N com vitória em k seguidas.
+
+Acima de 4 x 4 a busca exaustiva não termina, então o minimax daqui usa
+aprofundamento iterativo com poda alfa-beta: busca com profundidade 1,
+2, 3, ... até acabar o orçamento de tempo da jogada e devolve a melhor
+jogada da última profundidade completa. Nas folhas que não são terminais
+o valor vem de uma heurística que conta as janelas de k casas ainda
+abertas para cada jogador.
+
+A API pública é a mesma do tictactoe.py, com tabuleiros de listas de
+listas; tamanho, k e orçamento ficam em `options`.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+X = "X"
+O = "O"
+EMPTY = None
+
+options = {
+    # Lado do tabuleiro criado por initial_state
+    "size": 3,
+    # Peças seguidas para vencer; None usa o lado do tabuleiro
+    "win_length": None,
+    # Segundos por jogada; None busca até o fim do jogo
+    "time_budget": 1.0,
+    # Profundidade máxima do aprofundamento iterativo; None não limita
+    "max_depth": None,
+    # Processos para dividir as jogadas da raiz; None busca em série
+    "workers": None,
+}
+
+# Valor de uma vitória; vitórias mais cedo valem um pouco mais
+WIN = 1_000_000
+
+# Só entram na busca casas livres a até esta distância de alguma peça
+RADIUS = 2
+
+
+class Timeout(Exception):
+    """O orçamento de tempo da jogada acabou."""
+
+
+def initial_state():
+    return [[EMPTY] * options["size"] for _ in range(options["size"])]
+
+
+def win_length(board):
+    return min(options["win_length"] or len(board), len(board))
+
+
+def player(board):
+    cells = [cell for row in board for cell in row]
+    return O if cells.count(X) > cells.count(O) else X
+
+
+def actions(board):
+    return {(row, col)
+            for row in range(len(board))
+            for col in range(len(board))
+            if board[row][col] == EMPTY}
+
+
+def result(board, action):
+    row, col = action
+    if not 0 <= row < len(board) or not 0 <= col < len(board) or board[row][col] != EMPTY:
+        raise Exception("Ação inválida")
+    board_copy = [list(cells) for cells in board]
+    board_copy[row][col] = player(board)
+    return board_copy
+
+
+def winner(board):
+    size = len(board)
+    cells = [cell for row in board for cell in row]
+    for line in lines(size, win_length(board))[0]:
+        first = cells[line[0]]
+        if first != EMPTY and all(cells[i] == first for i in line):
+            return first
+    return None
+
+
+def terminal(board):
+    return winner(board) is not None or all(cell != EMPTY for row in board for cell in row)
+
+
+def utility(board):
+    return {X: 1, O: -1, None: 0}[winner(board)]
+
+
+def minimax(board, stats=None):
+    if terminal(board):
+        return None
+    budget = options["time_budget"]
+    deadline = None if budget is None else time.monotonic() + budget
+    search = Search(board, win_length(board), deadline)
+    move = search.best_move(player(board), options["max_depth"], executor(options["workers"]))
+    if stats is not None:
+        stats["nodes"] = stats.get("nodes", 0) + search.nodes
+    return move
+
+
+# (processos, pool) do último pool criado
+_executor = (None, None)
+
+
+def executor(workers):
+    """Pool de processos com `workers` processos, reaproveitado entre as jogadas."""
+    global _executor
+    if not workers:
+        return None
+    if _executor[0] != workers:
+        if _executor[1] is not None:
+            _executor[1].shutdown(cancel_futures=True)
+        _executor = (workers, ProcessPoolExecutor(workers))
+    return _executor[1]
+
+
+def root_move(cells, win_length, deadline, interruptible, turn, cell, depth, alpha):
+    """
+    Valor de jogar `cell` na raiz, buscado em um processo do pool com a
+    janela (alpha, infinito). Retorna (valor, nós), com valor None se o
+    orçamento acabou.
+    """
+    size = int(len(cells) ** 0.5)
+    board = [cells[row * size:(row + 1) * size] for row in range(size)]
+    search = Search(board, win_length, deadline)
+    search.interruptible = interruptible
+    search.play(cell, turn)
+    try:
+        value = -search.negamax(O if turn == X else X, depth - 1, -WIN - 1, -alpha, cell, 1)
+    except Timeout:
+        value = None
+    return value, search.nodes
+
+
+_lines = {}
+
+
+def lines(size, length):
+    """
+    Retorna (janelas, por_casa): todas as janelas de `length` casas
+    seguidas de um tabuleiro achatado, e para cada casa as janelas que
+    passam por ela.
+    """
+    if (size, length) not in _lines:
+        windows = []
+        for row in range(size):
+            for col in range(size):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_row = row + dr * (length - 1)
+                    end_col = col + dc * (length - 1)
+                    if 0 <= end_row < size and 0 <= end_col < size:
+                        windows.append(tuple((row + dr * i) * size + col + dc * i
+                                             for i in range(length)))
+        through = [[] for _ in range(size * size)]
+        for window in windows:
+            for cell in window:
+                through[cell].append(window)
+        _lines[size, length] = (windows, through)
+    return _lines[size, length]
+
+
+_layouts = {}
+
+
+def layout(size):
+    """
+    Retorna (ordem, vizinhas): as casas da mais central para a da borda, e
+    para cada casa as outras a até RADIUS de distância.
+    """
+    if size not in _layouts:
+        center = (size - 1) / 2
+        order = sorted(range(size * size),
+                       key=lambda cell: abs(cell // size - center) + abs(cell % size - center))
+        near = [[other for other in range(size * size)
+                 if other != cell
+                 and abs(other // size - cell // size) <= RADIUS
+                 and abs(other % size - cell % size) <= RADIUS]
+                for cell in range(size * size)]
+        _layouts[size] = (order, near)
+    return _layouts[size]
+
+
+class Search():
+    """
+    Uma busca a partir de `board`, em um tabuleiro achatado que é
+    modificado no lugar (joga e desfaz) durante a busca.
+    """
+
+    def __init__(self, board, win_length, deadline=None):
+        size = len(board)
+        self.size = size
+        self.win_length = win_length
+        self.cells = [cell for row in board for cell in row]
+        self.windows, self.through = lines(size, win_length)
+        self.deadline = deadline
+        self.nodes = 0
+        # Só a primeira profundidade não pode ser interrompida
+        self.interruptible = False
+
+        self.order, self.near = layout(size)
+        # Quantas peças há perto de cada casa
+        self.crowd = [0] * (size * size)
+        for cell in range(size * size):
+            if self.cells[cell] != EMPTY:
+                for other in self.near[cell]:
+                    self.crowd[other] += 1
+
+        # Pesos da heurística por número de peças em uma janela aberta
+        self.weights = [0] + [4 ** count for count in range(1, win_length + 1)]
+
+    def play(self, cell, turn):
+        self.cells[cell] = turn
+        for other in self.near[cell]:
+            self.crowd[other] += 1
+
+    def undo(self, cell):
+        self.cells[cell] = EMPTY
+        for other in self.near[cell]:
+            self.crowd[other] -= 1
+
+    def candidates(self):
+        """Casas livres perto de alguma peça, das mais centrais para as da borda."""
+        cells = self.cells
+        crowd = self.crowd
+        moves = [cell for cell in self.order if cells[cell] == EMPTY and crowd[cell]]
+        if not moves:
+            moves = [cell for cell in self.order if cells[cell] == EMPTY]
+        return moves
+
+    def completes(self, cell):
+        """True se a peça em `cell` fecha alguma janela."""
+        cells = self.cells
+        piece = cells[cell]
+        for window in self.through[cell]:
+            if all(cells[i] == piece for i in window):
+                return True
+        return False
+
+    def evaluate(self, turn):
+        """
+        Heurística do ponto de vista de `turn`: soma 4 ** n por janela com n
+        peças de um jogador e nenhuma do outro.
+        """
+        cells = self.cells
+        weights = self.weights
+        score = 0
+        for window in self.windows:
+            mine = theirs = 0
+            for i in window:
+                if cells[i] == turn:
+                    mine += 1
+                elif cells[i] != EMPTY:
+                    theirs += 1
+            if not theirs:
+                score += weights[mine]
+            elif not mine:
+                score -= weights[theirs]
+        return score
+
+    def negamax(self, turn, depth, alpha, beta, last, ply):
+        """
+        Valor da posição para `turn` buscando até `depth` jogadas à frente.
+        `last` é a casa que o adversário acabou de jogar, a única que pode
+        ter fechado uma linha.
+        """
+        self.nodes += 1
+        if (self.interruptible and self.deadline is not None and not self.nodes & 255
+                and time.monotonic() > self.deadline):
+            raise Timeout
+
+        if last is not None and self.completes(last):
+            return -(WIN - ply)
+        moves = self.candidates()
+        if not moves:
+            return 0
+        if depth == 0:
+            return self.evaluate(turn)
+
+        other = O if turn == X else X
+        best = -WIN - 1
+        for cell in moves:
+            self.play(cell, turn)
+            try:
+                value = -self.negamax(other, depth - 1, -beta, -alpha, cell, ply + 1)
+            finally:
+                self.undo(cell)
+            if value > best:
+                best = value
+                if best > alpha:
+                    alpha = best
+                if alpha >= beta:
+                    break
+        return best
+
+    def root(self, turn, depth, moves, executor=None):
+        """
+        Retorna (valor, casa) da melhor jogada com profundidade `depth`.
+
+        Com `executor`, a primeira jogada é buscada aqui e as outras em
+        paralelo, todas com o alpha que ela deu (young brothers wait). Um
+        valor acima desse alpha é exato e os outros não ganham dele, então
+        a escolha, inclusive nos empates, é a mesma da busca em série.
+        """
+        other = O if turn == X else X
+        alpha = -WIN - 1
+        best = None
+        for cell in moves if executor is None else moves[:1]:
+            self.play(cell, turn)
+            try:
+                value = -self.negamax(other, depth - 1, -WIN - 1, -alpha, cell, 1)
+            finally:
+                self.undo(cell)
+            if best is None or value > alpha:
+                alpha = value
+                best = cell
+        if executor is None or len(moves) == 1:
+            return alpha, best
+
+        futures = [executor.submit(root_move, self.cells, self.win_length, self.deadline,
+                                   self.interruptible, turn, cell, depth, alpha)
+                   for cell in moves[1:]]
+        results = [future.result() for future in futures]
+        self.nodes += sum(nodes for _, nodes in results)
+        if any(value is None for value, _ in results):
+            raise Timeout
+        for cell, (value, _) in zip(moves[1:], results):
+            if value > alpha:
+                alpha = value
+                best = cell
+        return alpha, best
+
+    def best_move(self, turn, max_depth=None, executor=None):
+        """
+        Aprofundamento iterativo até o fim do jogo, `max_depth`, uma vitória
+        ou derrota forçada ou o fim do orçamento. Retorna a jogada (linha,
+        coluna).
+        """
+        moves = self.candidates()
+        best = moves[0]
+        remaining = self.cells.count(EMPTY)
+        for depth in range(1, min(remaining, max_depth or remaining) + 1):
+            try:
+                value, best = self.root(turn, depth, moves, executor)
+            except Timeout:
+                break
+            self.interruptible = True
+            if abs(value) > WIN - remaining - 1:
+                break
+            # A melhor jogada da profundidade anterior é buscada primeiro
+            moves.remove(best)
+            moves.insert(0, best)
+        return divmod(best, self.size)
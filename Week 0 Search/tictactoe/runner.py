@@ -1,8 +1,16 @@
+import importlib
 import pygame
+import queue
 import sys
+import threading
 import time
 
-import tictactoe as ttt
+# Engine module to play against, e.g. `python runner.py bitboard`, and for
+# the nxn engine the board size and win length, e.g. `python runner.py nxn 7 5`
+ttt = importlib.import_module(sys.argv[1] if len(sys.argv) > 1 else "tictactoe")
+if len(sys.argv) > 2:
+    ttt.options["size"] = int(sys.argv[2])
+    ttt.options["win_length"] = int(sys.argv[3]) if len(sys.argv) > 3 else None
 
 pygame.display.init()
 size = width, height = 600, 400
@@ -16,11 +24,42 @@ screen = pygame.display.set_mode(size)
 pygame.font.init()
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# The AI searches in one long-lived background thread, so the window keeps
+# drawing and the engine's caches stay warm between moves. A thread behaves
+# the same on every platform; a search cannot be interrupted, so cancelling
+# a game just drops its move when it arrives.
+boards = queue.Queue()
+moves = queue.Queue()
+
+
+def serve():
+    """Answers each (game, board) from `boards` with (game, move) on `moves`."""
+    while True:
+        game, board = boards.get()
+        moves.put((game, ttt.minimax(board)))
+
+
+def next_move(game):
+    """The AI move for `game` once it is ready, else None."""
+    while True:
+        try:
+            answered, move = moves.get_nowait()
+        except queue.Empty:
+            return None
+        # Moves of cancelled games are dropped
+        if answered == game:
+            return move
+
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+board_size = len(board)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", 180 // board_size)
+threading.Thread(target=serve, daemon=True).start()
+game = 0
+thinking = False
+clock = pygame.time.Clock()
 
 while True:
 
@@ -68,13 +107,13 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_size = 240 // board_size
+        tile_origin = (width / 2 - (board_size / 2 * tile_size),
+                       height / 2 - (board_size / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(board_size):
             row = []
-            for j in range(3):
+            for j in range(board_size):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -103,45 +142,48 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            title = "Computer thinking" + "." * (pygame.time.get_ticks() // 400 % 4)
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Send the board to the AI thread, and apply its move once done
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+            if not thinking:
+                boards.put((game, board))
+                thinking = True
             else:
-                ai_turn = True
+                move = next_move(game)
+                if move is not None:
+                    thinking = False
+                    board = ttt.result(board, move)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(board_size):
+                for j in range(board_size):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
-
-    pygame.display.flip() 
\ No newline at end of file
+        # Play Again at the end, Reset during the game (also cancels the AI)
+        againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+        again = mediumFont.render("Play Again" if game_over else "Reset", True, black)
+        againRect = again.get_rect()
+        againRect.center = againButton.center
+        pygame.draw.rect(screen, white, againButton)
+        screen.blit(again, againRect)
+        click, _, _ = pygame.mouse.get_pressed()
+        if click == 1:
+            mouse = pygame.mouse.get_pos()
+            if againButton.collidepoint(mouse):
+                time.sleep(0.2)
+                game += 1
+                thinking = False
+                user = None
+                board = ttt.initial_state()
+
+    pygame.display.flip()
+    clock.tick(30) 
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""
+Partidas sem interface gráfica para medir e vigiar os motores.
+
+Joga partidas com semente, IA contra IA (as primeiras jogadas sorteadas,
+para as partidas não serem todas iguais) e IA contra jogadas aleatórias,
+e reporta jogadas por segundo, nós por jogada, cortes Alfa-Beta e a taxa
+de acertos da tabela de transposição, lidos do `stats` do minimax.
+
+Com jogo perfeito a IA nunca perde: se perder, o script sai com status 1,
+o que serve de teste de regressão para qualquer mudança nos motores.
+
+Uso: python selfplay.py [--engine tictactoe] [--games N] [--seed S]
+                        [--mode ai|random|both] [--no-book]
+"""
+
+import argparse
+import importlib
+import inspect
+import random
+import sys
+import time
+
+
+def takes_stats(function):
+    """Diz se `function` aceita o parâmetro `stats` de contadores."""
+    return "stats" in inspect.signature(function).parameters
+
+
+def play(engine, rng, mode, opening, use_book, totals):
+    """
+    Joga uma partida e retorna (vencedor, lado da IA); lado None quando a
+    IA joga pelos dois. Os contadores de cada busca são somados em `totals`;
+    motores cujo minimax não aceita `stats` só têm as jogadas medidas.
+    """
+    board = engine.initial_state()
+    ai = None if mode == "ai" else rng.choice((engine.X, engine.O))
+    plies = 0
+    while not engine.terminal(board):
+        turn = engine.player(board)
+        if (mode == "ai" and plies < opening) or (mode == "random" and turn != ai):
+            move = rng.choice(sorted(engine.actions(board)))
+        else:
+            stats = {}
+            start = time.perf_counter()
+            function = engine.minimax if use_book else engine.search
+            if takes_stats(function):
+                move = function(board, stats)
+            else:
+                move = function(board)
+            totals["seconds"] += time.perf_counter() - start
+            totals["moves"] += 1
+            if "nodes" in stats:
+                totals["max_nodes"] = max(totals.get("max_nodes", 0), stats["nodes"])
+            for name, value in stats.items():
+                totals[name] = totals.get(name, 0) + value
+        board = engine.result(board, move)
+        plies += 1
+    return engine.winner(board), ai
+
+
+def run(engine, games, seed, mode, opening, use_book):
+    totals = {"seconds": 0.0, "moves": 0}
+    results = {"X": 0, "O": 0, "draw": 0}
+    losses = 0
+    for game in range(games):
+        rng = random.Random(seed * 1_000_003 + game)
+        won, ai = play(engine, rng, mode, opening, use_book, totals)
+        results[won or "draw"] += 1
+        if ai is not None and won is not None and won != ai:
+            losses += 1
+
+    moves = max(totals["moves"], 1)
+    print(f"{mode}: {games} games, X {results['X']}, O {results['O']}, "
+          f"draws {results['draw']}, AI losses {losses}")
+    print(f"  {totals['moves']} AI moves, {totals['moves'] / max(totals['seconds'], 1e-9):.0f} moves/s")
+    # Só os contadores que o motor informou: nem todos contam cortes ou a tabela
+    if "nodes" in totals:
+        print(f"  nodes/move {totals['nodes'] / moves:.1f} (max {totals['max_nodes']})")
+    if "cutoffs" in totals:
+        print(f"  cutoffs/move {totals['cutoffs'] / moves:.1f}")
+    if "tt_probes" in totals:
+        print(f"  transposition table hit rate "
+              f"{totals.get('tt_hits', 0) / totals['tt_probes']:.1%}")
+    if "book_hits" in totals:
+        print(f"  opening book moves {totals['book_hits'] / moves:.1%}")
+    return losses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless tic-tac-toe self-play.")
+    parser.add_argument("--engine", default="tictactoe",
+                        help="engine module whose minimax accepts a stats dict")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=("ai", "random", "both"), default="both",
+                        help="AI vs AI, AI vs random moves, or both")
+    parser.add_argument("--opening", type=int, default=2,
+                        help="random plies at the start of AI vs AI games")
+    parser.add_argument("--no-book", action="store_true",
+                        help="always search, ignoring the opening book")
+    args = parser.parse_args()
+
+    engine = importlib.import_module(args.engine)
+    if args.no_book and not hasattr(engine, "search"):
+        parser.error(f"{args.engine} has no search() to call without the book")
+
+    losses = 0
+    for mode in ("ai", "random") if args.mode == "both" else (args.mode,):
+        losses += run(engine, args.games, args.seed, mode, args.opening, not args.no_book)
+    if losses:
+        print("AI lost games it should not have.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
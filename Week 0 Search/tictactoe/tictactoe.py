@@ -4,11 +4,24 @@ Tic Tac Toe Player
 
 import math
 import copy
+import functools
+
+import book
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Tipos de entrada da tabela de transposição: valor exato, limite inferior
+# (a busca foi cortada por beta) e limite superior (não passou de alpha)
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Tabela de transposição: forma canônica do tabuleiro -> (valor, tipo).
+# Fica no módulo para ser reaproveitada entre as jogadas e entre partidas
+transposition_table = {}
+
 
 def initial_state():
     return [[None, None, None], [None, None, None], [None, None, None]]
@@ -91,58 +104,322 @@ def utility(board):
 
 
 # Esta função implementa a parte Max do algoritmo Minimax com poda Alfa-Beta.
-def max_value(board, alpha, beta):
-    if terminal(board):
-        return utility(board)
-
+# A busca joga e desfaz as ações no próprio 'tabuleiro' (que volta igual ao
+# fim), sem copiar nada por nó. `last` é a última jogada feita, a única que
+# pode ter fechado uma linha, `stats` (opcional) recebe os contadores da busca,
+# `keys` são as chaves do tabuleiro em cada simetria e `free` o número de
+# casas livres; os três últimos são calculados se não forem passados.
+def max_value(board, alpha, beta, last=None, stats=None, keys=None, free=None):
+    count(stats, "nodes")
+    if keys is None:
+        keys = symmetry_keys(board)
+        free = count_free(board)
+    value = outcome(board, last, free)
+    if value is not None:
+        return value
+
+    key = min(keys)
+    entry = transposition_table.get(key)
+    count(stats, "tt_probes")
+    if entry is not None:
+        count(stats, "tt_hits")
+        value, bound = entry // 3 - 1, entry % 3
+        if bound == EXACT:
+            return value
+        if bound == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+    alpha_window, beta_window = alpha, beta
+
+    killer = killers.get(free)
     v = -math.inf
-    for action in actions(board):
-        v = max(v, min_value(result(board, action), alpha, beta))
+    # A killer move vai primeiro; o índice -1 é ela
+    for i in range(-1, len(MOVE_ORDER)):
+        action = killer if i < 0 else MOVE_ORDER[i]
+        if action is None or (i >= 0 and action == killer):
+            continue
+        row, col = action
+        if board[row][col] != EMPTY:
+            continue
+        apply(board, keys, action, X)
+        v = max(v, min_value(board, alpha, beta, action, stats, keys, free - 1))
+        undo(board, keys, action)
         if v >= beta:
-            return v
+            count(stats, "cutoffs")
+            killers[free] = action
+            break
         alpha = max(alpha, v)
+    store(key, v, alpha_window, beta_window)
     return v
 
 
 # Esta função implementa a parte Min do algoritmo Minimax com poda Alfa-Beta.
-def min_value(board, alpha, beta):
-    if terminal(board):
-        return utility(board)
-
+def min_value(board, alpha, beta, last=None, stats=None, keys=None, free=None):
+    count(stats, "nodes")
+    if keys is None:
+        keys = symmetry_keys(board)
+        free = count_free(board)
+    value = outcome(board, last, free)
+    if value is not None:
+        return value
+
+    key = min(keys)
+    entry = transposition_table.get(key)
+    count(stats, "tt_probes")
+    if entry is not None:
+        count(stats, "tt_hits")
+        value, bound = entry // 3 - 1, entry % 3
+        if bound == EXACT:
+            return value
+        if bound == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+    alpha_window, beta_window = alpha, beta
+
+    killer = killers.get(free)
     v = math.inf
-    for action in actions(board):
-        v = min(v, max_value(result(board, action), alpha, beta))
+    for i in range(-1, len(MOVE_ORDER)):
+        action = killer if i < 0 else MOVE_ORDER[i]
+        if action is None or (i >= 0 and action == killer):
+            continue
+        row, col = action
+        if board[row][col] != EMPTY:
+            continue
+        apply(board, keys, action, O)
+        v = min(v, max_value(board, alpha, beta, action, stats, keys, free - 1))
+        undo(board, keys, action)
         if v <= alpha:
-            return v
+            count(stats, "cutoffs")
+            killers[free] = action
+            break
         beta = min(beta, v)
+    store(key, v, alpha_window, beta_window)
     return v
 
 
+# Soma 1 ao contador `name` de `stats`, se houver um: nós visitados, cortes
+# Alfa-Beta, consultas e acertos na tabela de transposição e jogadas do livro.
+def count(stats, name):
+    if stats is not None:
+        stats[name] = stats.get(name, 0) + 1
+
+
+# Coloca a peça de `turn` em `action` no próprio 'tabuleiro', atualizando
+# as chaves de simetria.
+def apply(board, keys, action, turn):
+    row, col = action
+    board[row][col] = turn
+    weights = CELL_WEIGHTS[row * 3 + col]
+    code = CODES[turn]
+    for i in range(len(keys)):
+        keys[i] += code * weights[i]
+
+
+# Desfaz o apply: esvazia a casa e restaura as chaves.
+def undo(board, keys, action):
+    row, col = action
+    weights = CELL_WEIGHTS[row * 3 + col]
+    code = CODES[board[row][col]]
+    board[row][col] = EMPTY
+    for i in range(len(keys)):
+        keys[i] -= code * weights[i]
+
+
+# Retorna a utilidade se o jogo acabou ou None, sem chamar winner duas
+# vezes: se a última jogada é conhecida, basta olhar as linhas que passam
+# por ela.
+def outcome(board, last, free):
+    if last is None:
+        won = winner(board)
+        if won is not None:
+            return 1 if won == X else -1
+    else:
+        row, col = last
+        if wins_through(board, row, col):
+            return 1 if board[row][col] == X else -1
+    if free == 0:
+        return 0
+    return None
+
+
+# Conta as casas vazias do 'tabuleiro'.
+def count_free(board):
+    return sum(row.count(EMPTY) for row in board)
+
+
+# Verifica se a peça em (row, col) completa sua linha, coluna ou diagonal.
+def wins_through(board, row, col):
+    piece = board[row][col]
+    for line in lines_through(len(board))[row][col]:
+        for i, j in line:
+            if board[i][j] != piece:
+                break
+        else:
+            return True
+    return False
+
+
+# Para cada casa, as linhas (linha, coluna e diagonais) que passam por ela.
+@functools.lru_cache(maxsize=None)
+def lines_through(size):
+    lines = [tuple((row, col) for col in range(size)) for row in range(size)]
+    lines += [tuple((row, col) for row in range(size)) for col in range(size)]
+    lines.append(tuple((i, i) for i in range(size)))
+    lines.append(tuple((i, size - 1 - i) for i in range(size)))
+    return [[[line for line in lines if (row, col) in line] for col in range(size)]
+            for row in range(size)]
+
+
+# Ordem das casas para a busca: centro, cantos e depois bordas. Achar cedo
+# a melhor jogada faz a poda Alfa-Beta cortar mais.
+@functools.lru_cache(maxsize=None)
+def move_order(size):
+    middle = {(size - 1) // 2, size // 2}
+    ends = {0, size - 1}
+
+    def rank(cell):
+        row, col = cell
+        if row in middle and col in middle:
+            return 0
+        if row in ends and col in ends:
+            return 1
+        return 2
+
+    return tuple(sorted(((row, col) for row in range(size) for col in range(size)), key=rank))
+
+
+MOVE_ORDER = move_order(3)
+
+
+# Jogada que causou o último corte em cada profundidade (contada em casas
+# livres); ela costuma cortar de novo nas posições irmãs.
+killers = {}
+
+
+# As ações livres na ordem de move_order, com a killer move da profundidade
+# na frente.
+def ordered_actions(board):
+    moves = [(row, col) for row, col in move_order(len(board)) if board[row][col] == EMPTY]
+    killer = killers.get(len(moves))
+    if killer in moves:
+        moves.remove(killer)
+        moves.insert(0, killer)
+    return moves
+
+
+# Guarda o valor de uma busca feita na janela (alpha, beta): fora da janela
+# ele é só um limite para o valor verdadeiro. A entrada é um inteiro pequeno,
+# 3 * (valor + 1) + tipo.
+def store(key, value, alpha, beta):
+    if value <= alpha:
+        bound = UPPER
+    elif value >= beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    transposition_table[key] = 3 * (value + 1) + bound
+
+
+# As 8 simetrias do tabuleiro (4 rotações, cada uma com e sem reflexão),
+# como permutações das posições de um tabuleiro achatado linha a linha.
+def symmetries(size):
+    cells = [(row, col) for row in range(size) for col in range(size)]
+    last = size - 1
+    transforms = (
+        lambda r, c: (r, c),
+        lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c),
+        lambda r, c: (last - c, r),
+        lambda r, c: (r, last - c),
+        lambda r, c: (c, r),
+        lambda r, c: (last - r, c),
+        lambda r, c: (last - c, last - r),
+    )
+    return [tuple(transform(row, col)[0] * size + transform(row, col)[1]
+                  for row, col in cells)
+            for transform in transforms]
+
+
+SYMMETRIES = symmetries(3)
+
+# Código de cada peça na chave de um tabuleiro
+CODES = {EMPTY: 0, X: 1, O: 2}
+
+# Peso de cada casa na chave de cada simetria: a chave de um tabuleiro na
+# simetria s é a soma de CODES[peça] * CELL_WEIGHTS[casa][s], um número em
+# base 3 que apply e undo atualizam sem percorrer o tabuleiro.
+CELL_WEIGHTS = [tuple(3 ** permutation.index(cell) for permutation in SYMMETRIES)
+                for cell in range(9)]
+
+
+# As chaves do 'tabuleiro' em cada uma das 8 simetrias.
+def symmetry_keys(board):
+    keys = [0] * len(SYMMETRIES)
+    for row in range(3):
+        for col in range(3):
+            weights = CELL_WEIGHTS[row * 3 + col]
+            for i in range(len(keys)):
+                keys[i] += CODES[board[row][col]] * weights[i]
+    return keys
+
+
+# A canonical função retorna a mesma chave para tabuleiros equivalentes por
+# rotação ou reflexão: a menor entre as 8 versões transformadas.
+def canonical(board):
+    return min(symmetry_keys(board))
+
+
 # A minimax função deve receber o 'tabuleiro' como entrada e retornar o movimento ideal para o jogador se mover naquele 'tabuleiro'.
-def minimax(board):
+def minimax(board, stats=None):
     if terminal(board):
         return None
 
-    if player(board) == X:
-        best_score = -math.inf
-        best_action = None
-        for action in actions(board):
-            new_board = result(board, action)
-            score = min_value(new_board, -math.inf, math.inf)
-            if score > best_score:
-                best_score = score
+    # Com o livro de aberturas (python book.py) a jogada é só uma consulta
+    move = book.lookup(board)
+    if move is not None:
+        count(stats, "book_hits")
+        return move
+    return search(board, stats)
+
+
+# Busca a melhor jogada sem o livro. A janela Alfa-Beta é compartilhada entre
+# as ações da raiz: depois da primeira, as outras só precisam provar se
+# superam a melhor até agora.
+def search(board, stats=None):
+    # Uma única cópia: a busca joga e desfaz nela, e o 'tabuleiro' de quem
+    # chamou nunca muda, nem durante a busca
+    board = [list(row) for row in board]
+    keys = symmetry_keys(board)
+    free = count_free(board)
+    turn = player(board)
+    alpha = -math.inf
+    beta = math.inf
+    best_action = None
+    for action in ordered_actions(board):
+        apply(board, keys, action, turn)
+        if turn == X:
+            score = min_value(board, alpha, beta, action, stats, keys, free - 1)
+        else:
+            score = max_value(board, alpha, beta, action, stats, keys, free - 1)
+        undo(board, keys, action)
+        if turn == X:
+            if best_action is None or score > alpha:
+                alpha = score
                 best_action = action
-        return best_action
-    else:
-        best_score = math.inf
-        best_action = None
-        for action in actions(board):
-            new_board = result(board, action)
-            score = max_value(new_board, -math.inf, math.inf)
-            if score < best_score:
-                best_score = score
+        else:
+            if best_action is None or score < beta:
+                beta = score
                 best_action = action
-        return best_action
+        # Não há como melhorar uma vitória
+        if alpha >= 1 or beta <= -1:
+            break
+    return best_action
 
 
 # Esta função verifica se um jogador ganhou preenchendo uma linha inteira no 'tabuleiro'.
@@ -158,9 +435,9 @@ def checkColumns(board, player):
 # Esta função verifica se um jogador ganhou preenchendo as diagonais do 'tabuleiro'.
 # Verifique a diagonal principal
 def checkFirstDiag(board, player):
-    return board[0][0] == player and board[1][1] == player and board[2][2] == player
+    return all(board[i][i] == player for i in range(len(board)))
 
 
 # Verifique a diagonal secundária
 def checkSecDiag(board, player):
-    return board[0][2] == player and board[1][1] == player and board[2][0] == player
+    return all(board[i][len(board) - 1 - i] == player for i in range(len(board)))
@@ -15,6 +15,32 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def source(self, positions, variable):
+        """
+        Returns a Python expression for the sentence, where the symbol at
+        positions[name] is read by variable.format(position).
+        """
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols, bitmask=True):
+        """
+        Compiles the sentence into one generated function of a model, so
+        evaluating it is a single call with no tree walk or dict lookups.
+
+        The model is a bitmask where bit i is the value of symbols[i], or,
+        with bitmask=False, a tuple of values in the order of symbols.
+        """
+        positions = {name: i for i, name in enumerate(symbols)}
+        variable = "(m >> {} & 1)" if bitmask else "m[{}]"
+        try:
+            return eval(f"lambda m: bool({self.source(positions, variable)})")
+        except (SyntaxError, RecursionError, MemoryError):
+            # Too deeply nested for the parser: walk the tree instead
+            if bitmask:
+                return lambda m: self.evaluate(
+                    {name: bool(m >> i & 1) for name, i in positions.items()})
+            return lambda m: self.evaluate(dict(zip(symbols, m)))
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -68,6 +94,11 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def source(self, positions, variable):
+        if self.name not in positions:
+            raise Exception(f"variable {self.name} not in model")
+        return variable.format(positions[self.name])
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -92,6 +123,9 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def source(self, positions, variable):
+        return f"(not {self.operand.source(positions, variable)})"
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -129,6 +163,12 @@ class And(Sentence):
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def source(self, positions, variable):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(conjunct.source(positions, variable)
+                                  for conjunct in self.conjuncts) + ")"
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -160,6 +200,12 @@ class Or(Sentence):
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def source(self, positions, variable):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(disjunct.source(positions, variable)
+                                 for disjunct in self.disjuncts) + ")"
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -191,6 +237,11 @@ class Implication(Sentence):
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def source(self, positions, variable):
+        antecedent = self.antecedent.source(positions, variable)
+        consequent = self.consequent.source(positions, variable)
+        return f"(not {antecedent} or {consequent})"
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -211,10 +262,7 @@ class Biconditional(Sentence):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return bool(self.left.evaluate(model)) == bool(self.right.evaluate(model))
 
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
@@ -224,40 +272,57 @@ class Biconditional(Sentence):
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
+    def source(self, positions, variable):
+        left = self.left.source(positions, variable)
+        right = self.right.source(positions, variable)
+        return f"((not {left}) == (not {right}))"
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
 
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
+def model_check(knowledge, query, backend=None):
+    """
+    Checks if knowledge base entails query, using the entailment backend
+    named `backend` (see BACKENDS), or DEFAULT_BACKEND.
+    """
+    return BACKENDS[backend or DEFAULT_BACKEND](knowledge, query)
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+def enumerate_models(knowledge, query):
+    """Checks if knowledge base entails query by enumerating all models."""
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    # Each model is a bitmask over the symbols, evaluated by compiled sentences
+    knowledge_holds = knowledge.compile(symbols)
+    query_holds = query.compile(symbols)
+
+    # If knowledge base is true in a model, then query must also be true
+    return all(query_holds(model)
+               for model in range(1 << len(symbols))
+               if knowledge_holds(model))
+
+
+def sat_check(knowledge, query):
+    """Checks if knowledge base entails query with a CDCL SAT solver."""
+    # Imported here because sat.py imports this module
+    import sat
+    return sat.entails(knowledge, query)
+
+
+def truth_table_check(knowledge, query):
+    """
+    Checks if knowledge base entails query by evaluating it over chunks of
+    models at once, as bit columns (NumPy arrays if NumPy is installed).
+    """
+    # Imported here because truthtable.py imports this module
+    import truthtable
+    return truthtable.entails(knowledge, query)
+
+
+# Entailment backends: each takes (knowledge, query) and returns a bool
+BACKENDS = {
+    "enumerate": enumerate_models,
+    "sat": sat_check,
+    "truthtable": truth_table_check,
+}
+DEFAULT_BACKEND = "sat"
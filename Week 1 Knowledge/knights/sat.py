@@ -0,0 +1,315 @@
+"""
+Entailment by satisfiability.
+
+KB entails query exactly when KB ∧ ¬query has no model. Instead of
+enumerating all 2^n models, the sentence is converted to CNF with the
+Tseitin encoding (one fresh variable per connective, so the CNF stays
+linear in the size of the sentence) and handed to a CDCL solver with
+two watched literals per clause, 1UIP clause learning, non-chronological
+backjumping and an activity-based decision order.
+
+Literals are non-zero integers, as in DIMACS: variable v is v, ¬v is -v.
+Per-literal tables are lists of length 2 * count + 1 indexed directly by
+the literal, so -v lands at position 2 * count + 1 - v.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Sentence, Symbol
+
+
+class CNF():
+    """Clauses built from sentences with the Tseitin encoding."""
+
+    def __init__(self):
+        self.count = 0
+        self.clauses = []
+        # Symbol name -> variable
+        self.variables = {}
+        # Sentence -> literal of its gate, so shared subformulas are
+        # encoded only once
+        self.gates = {}
+
+    def new_variable(self):
+        self.count += 1
+        return self.count
+
+    def variable(self, name):
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def add(self, sentence):
+        """Asserts that `sentence` is true."""
+        # Top-level conjunctions need no gate: assert each conjunct
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal that is true exactly when `sentence` is."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.gates:
+            return self.gates[sentence]
+
+        if isinstance(sentence, And):
+            literals = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            gate = self.new_variable()
+            # gate => each conjunct, and all conjuncts => gate
+            for literal in literals:
+                self.clauses.append([-gate, literal])
+            self.clauses.append([gate] + [-literal for literal in literals])
+        elif isinstance(sentence, (Or, Implication)):
+            if isinstance(sentence, Or):
+                literals = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            else:
+                literals = [-self.literal(sentence.antecedent),
+                            self.literal(sentence.consequent)]
+            gate = self.new_variable()
+            # each disjunct => gate, and gate => some disjunct
+            for literal in literals:
+                self.clauses.append([gate, -literal])
+            self.clauses.append([-gate] + literals)
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            gate = self.new_variable()
+            self.clauses.append([-gate, -left, right])
+            self.clauses.append([-gate, left, -right])
+            self.clauses.append([gate, left, right])
+            self.clauses.append([gate, -left, -right])
+        else:
+            Sentence.validate(sentence)
+            raise TypeError(f"cannot convert {type(sentence).__name__} to CNF")
+
+        self.gates[sentence] = gate
+        return gate
+
+
+class Solver():
+    """
+    CDCL solver over clauses of integer literals on variables 1..count.
+    """
+
+    def __init__(self, count, clauses):
+        self.count = count
+        self.clauses = []
+        # Literal -> indices of clauses watching it (its first two literals)
+        self.watches = [[] for _ in range(2 * count + 1)]
+        # Literal -> True, False or None
+        self.truth = [None] * (2 * count + 1)
+        self.levels = [0] * (count + 1)
+        # Variable -> index of the clause that implied it (None if decided)
+        self.reasons = [None] * (count + 1)
+        self.trail = []
+        # Position in the trail where each decision level starts
+        self.limits = []
+        # Position in the trail of the next assignment to propagate
+        self.head = 0
+        self.activity = [0.0] * (count + 1)
+        self.bump = 1.0
+        # Last value of each variable, reused on the next decision
+        self.phases = [False] * (count + 1)
+        self.conflicting = False
+
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def value(self, literal):
+        return self.truth[literal]
+
+    def add_clause(self, clause):
+        # Drop duplicate literals and tautologies
+        clause = list(dict.fromkeys(clause))
+        if any(-literal in clause for literal in clause):
+            return
+        if not clause:
+            self.conflicting = True
+        elif len(clause) == 1:
+            value = self.value(clause[0])
+            if value is False:
+                self.conflicting = True
+            elif value is None:
+                self.assign(clause[0], None)
+        else:
+            self.watch(clause)
+
+    def watch(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.truth[literal] = True
+        self.truth[-literal] = False
+        self.levels[variable] = len(self.limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Unit propagation over the watched literals. Returns the index of a
+        conflicting clause, or None.
+        """
+        truth = self.truth
+        clauses = self.clauses
+        trail = self.trail
+        while self.head < len(trail):
+            false_literal = -trail[self.head]
+            self.head += 1
+            watchers = self.watches[false_literal]
+            kept = []
+            conflict = None
+            for position, index in enumerate(watchers):
+                clause = clauses[index]
+                # Keep the false literal in position 1
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+                first = clause[0]
+                if truth[first] is True:
+                    kept.append(index)
+                    continue
+
+                # Look for another literal that is not false to watch
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if truth[literal] is not False:
+                        clause[1] = literal
+                        clause[k] = false_literal
+                        self.watches[literal].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if truth[first] is False:
+                        conflict = index
+                        kept.extend(watchers[position + 1:])
+                        break
+                    self.assign(first, index)
+            self.watches[false_literal] = kept
+            if conflict is not None:
+                return conflict
+        return None
+
+    def analyze(self, conflict):
+        """
+        Derives the first-UIP clause from a conflict. Returns the learned
+        clause (asserting literal first) and the level to backjump to.
+        """
+        level = len(self.limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        literal = None
+        clause = self.clauses[conflict]
+        position = len(self.trail)
+
+        while True:
+            for other in clause:
+                if other == literal:
+                    continue
+                variable = abs(other)
+                if variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.activity[variable] += self.bump
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Walk back to the latest assignment of this level in the clause
+            position -= 1
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            seen.discard(abs(literal))
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+        # The literal with the highest level becomes the second watch
+        highest = max(range(1, len(learned)), key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[highest] = learned[highest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def backjump(self, level):
+        start = self.limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = literal > 0
+            self.truth[literal] = None
+            self.truth[-literal] = None
+            self.reasons[variable] = None
+        del self.trail[start:]
+        del self.limits[level:]
+        self.head = start
+
+    def decide(self):
+        """Picks the unassigned variable with the highest activity."""
+        best = None
+        for variable in range(1, self.count + 1):
+            if self.truth[variable] is None and (
+                    best is None or self.activity[variable] > self.activity[best]):
+                best = variable
+        return best
+
+    def solve(self):
+        """Returns True if the clauses are satisfiable."""
+        if self.conflicting:
+            return False
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.limits:
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backjump(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.watch(learned))
+                # Decay old activity by growing the bump instead
+                self.bump *= 1.05
+                if self.bump > 1e100:
+                    self.activity = [activity * 1e-100 for activity in self.activity]
+                    self.bump *= 1e-100
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                return True
+            self.limits.append(len(self.trail))
+            self.assign(variable if self.phases[variable] else -variable, None)
+
+    def model(self):
+        """Values of variables 1..count after a successful solve()."""
+        return {variable: self.truth[variable] is True for variable in range(1, self.count + 1)}
+
+
+def satisfiable(sentence):
+    """Returns a model (symbol name -> bool) of `sentence`, or None."""
+    cnf = CNF()
+    cnf.add(sentence)
+    solver = Solver(cnf.count, cnf.clauses)
+    if not solver.solve():
+        return None
+    values = solver.model()
+    return {name: values[variable] for name, variable in cnf.variables.items()}
+
+
+def entails(knowledge, query):
+    """Checks if knowledge base entails query: KB ∧ ¬query is unsatisfiable."""
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return not Solver(cnf.count, cnf.clauses).solve()
@@ -0,0 +1,118 @@
+"""
+Truth-table entailment evaluated over many models at once.
+
+Each Symbol becomes a packed boolean column with one bit per model, and
+each connective a bitwise operation on whole columns, so a sentence is
+evaluated over 2^CHUNK_BITS models with one pass over its tree instead of
+one recursive evaluate() call per model. Models are enumerated in chunks
+of that size, which keeps memory bounded: the first CHUNK_BITS symbols
+vary inside a chunk and the others are constant within it.
+
+Columns are NumPy uint64 arrays (64 models per word) when NumPy is
+installed, and otherwise Python integers, whose bitwise operators also
+run over all bits in C. Both support &, | and ^, so the same evaluator
+serves both.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Sentence, Symbol
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# log2 of the number of models evaluated together
+CHUNK_BITS = 20
+
+WORD_BITS = 64
+WORD_SHIFT = 6
+
+
+class IntColumns():
+    """Columns as Python integers, bit j for model j of the chunk."""
+
+    def __init__(self, bits):
+        self.models = 1 << bits
+        self.full = (1 << self.models) - 1
+        self.empty = 0
+
+    def pattern(self, i):
+        """Column of the i-th symbol: bit j is bit i of j."""
+        period = 1 << (i + 1)
+        block = ((1 << (1 << i)) - 1) << (1 << i)
+        # Repeats the block models / period times
+        return block * (self.full // ((1 << period) - 1))
+
+    def any(self, column):
+        return column != 0
+
+
+class ArrayColumns():
+    """Columns as NumPy uint64 arrays, 64 models per word."""
+
+    def __init__(self, bits):
+        self.models = 1 << bits
+        words = max(1, self.models // WORD_BITS)
+        self.width = min(self.models, WORD_BITS)
+        mask = (1 << self.width) - 1
+        self.full = numpy.full(words, mask, dtype=numpy.uint64)
+        self.empty = numpy.zeros(words, dtype=numpy.uint64)
+
+    def pattern(self, i):
+        if (1 << i) < self.width:
+            word = sum(1 << j for j in range(self.width) if j >> i & 1)
+            return numpy.full(len(self.full), word, dtype=numpy.uint64)
+        # Constant inside each word: bit i of the model is bit i - 6 of the word index
+        selected = numpy.arange(len(self.full)) >> (i - WORD_SHIFT) & 1
+        return numpy.where(selected == 1, self.full, self.empty)
+
+    def any(self, column):
+        return bool(column.any())
+
+
+def evaluate(sentence, columns, full):
+    """Evaluates `sentence` over every model of a chunk at once."""
+    if isinstance(sentence, Symbol):
+        return columns[sentence.name]
+    if isinstance(sentence, Not):
+        return full ^ evaluate(sentence.operand, columns, full)
+    if isinstance(sentence, And):
+        result = full
+        for conjunct in sentence.conjuncts:
+            result = result & evaluate(conjunct, columns, full)
+        return result
+    if isinstance(sentence, Or):
+        result = full ^ full
+        for disjunct in sentence.disjuncts:
+            result = result | evaluate(disjunct, columns, full)
+        return result
+    if isinstance(sentence, Implication):
+        return ((full ^ evaluate(sentence.antecedent, columns, full))
+                | evaluate(sentence.consequent, columns, full))
+    if isinstance(sentence, Biconditional):
+        return full ^ (evaluate(sentence.left, columns, full)
+                       ^ evaluate(sentence.right, columns, full))
+    Sentence.validate(sentence)
+    raise TypeError(f"cannot evaluate {type(sentence).__name__} over columns")
+
+
+def entails(knowledge, query, chunk_bits=CHUNK_BITS):
+    """
+    Checks if knowledge base entails query: no model where knowledge is
+    true and query false, checked one chunk of models at a time.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    bits = min(len(symbols), chunk_bits)
+    layout = (ArrayColumns if numpy is not None else IntColumns)(bits)
+    inner = {name: layout.pattern(i) for i, name in enumerate(symbols[:bits])}
+
+    for chunk in range(1 << (len(symbols) - bits)):
+        columns = dict(inner)
+        for i, name in enumerate(symbols[bits:]):
+            columns[name] = layout.full if chunk >> i & 1 else layout.empty
+        kb = evaluate(knowledge, columns, layout.full)
+        if not layout.any(kb):
+            continue
+        if layout.any(kb & (layout.full ^ evaluate(query, columns, layout.full))):
+            return False
+    return True